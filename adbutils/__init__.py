@@ -7,17 +7,23 @@ import io
 import os
 import typing
 
-from deprecation import deprecated
-
 from adbutils._adb import AdbConnection
 from adbutils._adb import BaseClient as _BaseClient
 from adbutils._device import AdbDevice, Sync
 from adbutils._proto import *
-from adbutils._utils import adb_path, StopEvent
+from adbutils._utils import adb_path, deprecated, StopEvent
 from adbutils._version import __version__
 from adbutils.errors import *
 
 
+def __getattr__(name: str):
+    # asyncio is slow to import, only load it when AsyncAdbDevice is used
+    if name == "AsyncAdbDevice":
+        from adbutils._aio import AsyncAdbDevice
+        return AsyncAdbDevice
+    raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
+
+
 class AdbClient(_BaseClient):
     def sync(self, serial: str) -> Sync:
         return Sync(self, serial)
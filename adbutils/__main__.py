@@ -15,28 +15,28 @@ import functools
 import json
 import os
 import re
-import shutil
 import subprocess
 import sys
-import zipfile
-
-import requests
 
 import adbutils
 from adbutils import adb as adbclient
-from adbutils._utils import ReadProgress, current_ip, APKReader
+from adbutils._utils import ReadProgress, current_ip, http_session, APKReader
 
 
 def _setup_minicap(d: adbutils.AdbDevice):
+    # only needed for --minicap, keep them out of the cold start path
+    import shutil
+    import zipfile
+
     def cache_download(url, dst):
         if os.path.exists(dst):
             print("Use cached", dst)
             return
         print("Download {} from {}".format(dst, url))
-        resp = requests.get(url, stream=True)
+        resp = http_session().get(url, stream=True)
         resp.raise_for_status()
         length = int(resp.headers.get("Content-Length", 0))
-        r = ReadProgress(resp.raw, length)
+        r = ReadProgress(resp.iter_content(chunk_size=1 << 20), length)
         with open(dst + ".cached", "wb") as f:
             shutil.copyfileobj(r, f)
         shutil.move(dst + ".cached", dst)
@@ -82,6 +82,13 @@ def _setup_minicap(d: adbutils.AdbDevice):
     print("If you see JSON output, it means minicap installed successfully")
 
 
+def _print_table(rows: list):
+    """ print rows as left aligned columns """
+    lens = [max(len(v) for v in col) for col in zip(*rows)]
+    sys.stdout.writelines(
+        "  ".join(v.ljust(l) for v, l in zip(row, lens)) + "\n" for row in rows)
+
+
 def main():
     parser = argparse.ArgumentParser()
     # formatter_class=argparse.ArgumentDefaultsHelpFormatter)
@@ -105,6 +112,12 @@ def main():
         "--install-confirm",
         action="store_true",
         help="auto confirm when install (based on uiautomator2)")
+    parser.add_argument("--install-stream",
+                        action="store_true",
+                        help="stream apk to 'cmd package install' instead of push first")
+    parser.add_argument("--verify",
+                        action="store_true",
+                        help="verify md5 of the pushed apk when install")
     parser.add_argument("-u", "--uninstall", help="uninstall apk")
     parser.add_argument("-L", "--launch", action="store_true", help="launch after install")
     parser.add_argument("--qrcode", help="show qrcode of the specified file")
@@ -156,24 +169,14 @@ def main():
         rows = []
         for info in adbclient.list(extended=True):
             rows.append([info.serial, " ".join([k+":"+v for (k,v) in info.tags.items()])])
-        lens = []
-        for col in zip(*rows):
-            lens.append(max([len(v) for v in col]))
-        format = "  ".join(["{:<" + str(l) + "}" for l in lens])
-        for row in rows:
-            print(format.format(*row))
+        _print_table(rows)
         return
 
     if args.list:
         rows = []
         for d in adbclient.device_list():
             rows.append([d.serial, d.shell("getprop ro.product.model")])
-        lens = []
-        for col in zip(*rows):
-            lens.append(max([len(v) for v in col]))
-        format = "  ".join(["{:<" + str(l) + "}" for l in lens])
-        for row in rows:
-            print(format.format(*row))
+        _print_table(rows)
         return
 
     if args.qrcode:
@@ -217,7 +220,7 @@ def main():
         uri = args.parse
         
         fp = None
-        if re.match(r"^https?://", uri):
+        if uri.startswith(("http://", "https://")):
             try:
                 import httpio
             except ImportError:
@@ -265,16 +268,17 @@ def main():
         else:
             _callback = None
 
-        d.install(args.install, nolaunch=not args.launch, uninstall=True, callback=_callback)
+        d.install(args.install, nolaunch=not args.launch, uninstall=True, callback=_callback,
+                  verify=args.verify, stream=args.install_stream)
 
     elif args.uninstall:
         d.uninstall(args.uninstall)
 
     elif args.list_packages:
-        patten = re.compile(args.grep or ".*")
-        for p in d.list_packages():
-            if patten.search(p):
-                print(p)
+        packages = d.list_packages()
+        if args.grep:
+            packages = filter(re.compile(args.grep).search, packages)
+        sys.stdout.writelines(p + "\n" for p in packages)
 
     elif args.screenshot:
         if args.minicap:
@@ -298,8 +302,7 @@ def main():
             d.sync.pull("/sdcard/minicap.jpg", args.screenshot)
         else:
             remote_tmp_path = "/data/local/tmp/screenshot.png"
-            d.shell(["rm", remote_tmp_path])
-            d.shell(["screencap", "-p", remote_tmp_path])
+            d.shell(f"rm -f {remote_tmp_path}; screencap -p {remote_tmp_path}")
             d.sync.pull(remote_tmp_path, args.screenshot)
 
     elif args.minicap:  # without args.screenshot
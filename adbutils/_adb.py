@@ -6,17 +6,19 @@
 
 from __future__ import annotations
 
+import errno
 import os
-import platform
+import re
+import select
 import socket
-import subprocess
+import struct
+import sys
+import time
 import typing
 import weakref
 from typing import Iterator, List, Union
 
-from deprecation import deprecated
-
-from adbutils._utils import adb_path
+from adbutils._utils import adb_path, deprecated
 from adbutils.errors import AdbConnectionError, AdbError, AdbTimeout
 
 from adbutils._proto import *
@@ -24,16 +26,40 @@ from adbutils._version import __version__
 
 _OKAY = b"OKAY"
 _FAIL = b"FAIL"
+_U32 = struct.Struct("<I")
+
+# a line of list-forward output, exactly three fields: <serial> <local> <remote>
+_FORWARD_LINE_RE = re.compile(r"^(\S+)[^\S\n]+(\S+)[^\S\n]+(\S+)[^\S\n]*$", re.M)
+
+# (option, value) of IPPROTO_TCP keepalive settings, macOS has no TCP_KEEPIDLE
+_KEEPALIVE_OPTS = ((socket.TCP_KEEPCNT, 3), (socket.TCP_KEEPINTVL, 10))
+if sys.platform != "darwin":
+    _KEEPALIVE_OPTS = ((socket.TCP_KEEPIDLE, 10),) + _KEEPALIVE_OPTS
+
+_LOOPBACK_HOSTS = ("127.0.0.1", "::1", "localhost")
+
+_START_SERVER_INTERVAL = 2.0  # seconds
+_last_start_server = -_START_SERVER_INTERVAL  # time.monotonic() when "adb start-server" last finished
+
+_HAS_SENDMSG = hasattr(socket.socket, "sendmsg")
+
+# connect_ex return values of a non-blocking connect still in progress
+_CONNECT_PENDING = (errno.EINPROGRESS, errno.EWOULDBLOCK, getattr(errno, "WSAEWOULDBLOCK", errno.EWOULDBLOCK))
 
 
 def _check_server(host: str, port: int) -> bool:
     """ Returns if server is running """
     s = socket.socket()
     try:
-        s.settimeout(.1)
-        s.connect((host, port))
-        return True
-    except (socket.timeout, socket.error) as e:
+        s.setblocking(False)
+        err = s.connect_ex((host, port))
+        if err in _CONNECT_PENDING:
+            _, writable, _ = select.select([], [s], [], .1)
+            if not writable:
+                return False
+            err = s.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+        return err in (0, errno.EISCONN)
+    except socket.error:
         return False
     finally:
         s.close()
@@ -51,13 +77,11 @@ class AdbConnection(object):
         adb_host = self.__host
         adb_port = self.__port
         s = socket.socket()
-        s.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1) # Set TCP keepalive
-        if platform.system() == "Darwin":
-            pass
-        else:
-            s.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 10)
-        s.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 3)
-        s.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 10)
+        s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1) # small request/response, do not wait for Nagle
+        if adb_host not in _LOOPBACK_HOSTS: # a local server going away resets the socket anyway
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1) # Set TCP keepalive
+            for opt, value in _KEEPALIVE_OPTS:
+                s.setsockopt(socket.IPPROTO_TCP, opt, value)
         try:
             s.settimeout(3) # prevent socket hang
             s.connect((adb_host, adb_port))
@@ -70,14 +94,20 @@ class AdbConnection(object):
 
 
     def _safe_connect(self):
+        global _last_start_server
         try:
             return self._create_socket()
-        except AdbTimeout:
-            pass
-        except AdbConnectionError:
-            pass
-        flags = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
-        subprocess.run([adb_path(), "start-server"], timeout=20.0, creationflags=flags)  # 20s should enough for adb start
+        except (AdbTimeout, AdbConnectionError):
+            # adb start-server has just been run and did not help, do not wait for it again
+            if time.monotonic() - _last_start_server < _START_SERVER_INTERVAL:
+                raise
+        import subprocess  # only needed when the adb server is not running
+
+        creationflags = subprocess.CREATE_NO_WINDOW if os.name == 'nt' else 0
+        try:
+            subprocess.run([adb_path(), "start-server"], timeout=20.0, creationflags=creationflags)  # 20s should enough for adb start
+        finally:
+            _last_start_server = time.monotonic()
         return self._create_socket()
 
     @property
@@ -108,50 +138,81 @@ class AdbConnection(object):
     
     def read_uint32(self) -> int:
         data = self.read(4)
-        return int.from_bytes(data, "little")
+        if len(data) != 4:
+            raise AdbError("connection closed")
+        return _U32.unpack(data)[0]
 
     def _read_fully(self, n: int) -> bytes:
-        t = n
-        buffer = b''
-        while t > 0:
-            chunk = self.conn.recv(t)
-            if not chunk:
+        # Do not add read-ahead buffering here (eg: conn.makefile), Sync, logcat and
+        # create_connection keep reading from self.conn after the protocol header,
+        # bytes prefetched into a buffer would be lost for them.
+        buffer = bytearray(n)
+        view = memoryview(buffer)
+        offset = 0
+        while offset < n:
+            nbytes = self.conn.recv_into(view[offset:])
+            if not nbytes:
                 break
-            buffer += chunk
-            t = n - len(buffer)
-        return buffer
+            offset += nbytes
+        if offset == n:  # common case, no slice of the view needed
+            return bytes(buffer)
+        return bytes(view[:offset])
 
     def send_command(self, cmd: str):
         cmd_bytes = cmd.encode("utf-8")
-        self.conn.send("{:04x}".format(len(cmd_bytes)).encode("utf-8") + cmd_bytes)
+        header = b"%04x" % len(cmd_bytes)
+        if not _HAS_SENDMSG:  # windows
+            self.conn.sendall(header + cmd_bytes)
+            return
+        # header and body as two buffers, no joined copy of the command
+        sent = self.conn.sendmsg([header, cmd_bytes])
+        if sent < len(header) + len(cmd_bytes):
+            self.conn.sendall((header + cmd_bytes)[sent:])
 
     def read_string(self, n: int) -> str:
         data = self.read(n).decode("utf-8", errors="replace")
         return data
 
-    def read_string_block(self) -> str:
+    def read_bytes_block(self) -> bytes:
         """
         Raises:
             AdbError
         """
-        length = self.read_string(4)
+        length = self.read(4)
         if not length:
             raise AdbError("connection closed")
-        size = int(length, 16)
-        return self.read_string(size)
+        size = int(length, 16)  # int() accepts the ascii hex bytes directly
+        return self.read(size)
+
+    def read_string_block(self) -> str:
+        """
+        Raises:
+            AdbError
+        """
+        return self.read_bytes_block().decode("utf-8", errors="replace")
 
-    def read_until_close(self, encoding: str | None = "utf-8") -> Union[str, bytes]:
+    def read_until_close(self, encoding: str | None = "utf-8", rstrip: bool = False) -> Union[str, bytes]:
         """
         read until connection close
         :param encoding: default utf-8, if pass None, return bytes
+        :param rstrip: strip trailing whitespace of the decoded text, only work when encoding is set
         """
-        content = b""
-        while True:
-            chunk = self.read(4096)
-            if not chunk:
-                break
-            content += chunk
-        return content.decode(encoding, errors='replace') if encoding else content
+        content = bytearray()
+        # recv into one reused chunk, no bytes object allocated per recv
+        chunk = bytearray(65536)
+        view = memoryview(chunk)
+        try:
+            while True:
+                n = self.conn.recv_into(chunk)
+                if not n:
+                    break
+                content += view[:n]
+        except socket.timeout:
+            raise AdbTimeout("adb read timeout")
+        if not encoding:
+            return bytes(content)
+        text = content.decode(encoding, errors='replace')
+        return text.rstrip() if rstrip else text
 
     def check_okay(self):
         data = self.read(4)
@@ -308,33 +369,35 @@ class BaseClient(object):
         Raises:
             AdbError when adb-server was killed
         """
-        orig_devices = []
+        orig_devices = {}
 
         with self.make_connection() as c:
             c.send_command("host:track-devices")
             c.check_okay()
             while True:
-                output = c.read_string_block()
+                output = c.read_bytes_block()
                 curr_devices = self._output2devices(output)
                 for event in self._diff_devices(orig_devices, curr_devices):
                     yield event
                 orig_devices = curr_devices
 
-    def _output2devices(self, output: str):
-        devices = []
-        for line in output.splitlines():
-            fields = line.strip().split("\t", maxsplit=1)
-            if len(fields) != 2:
+    def _output2devices(self, output: bytes) -> typing.Dict[str, str]:
+        """ Returns: dict of serial -> status, serial and status are ascii only """
+        devices = {}
+        for line in output.split(b"\n"):
+            serial, _, status = line.partition(b"\t")
+            if not status:
                 continue
-            serial, status = fields
-            devices.append(DeviceEvent(None, serial, status))
+            devices[serial.strip().decode("ascii")] = status.strip().decode("ascii")
         return devices
 
-    def _diff_devices(self, orig: typing.List[DeviceEvent], curr: typing.List[DeviceEvent]):
-        for d in set(orig).difference(curr):
-            yield DeviceEvent(False, d.serial, 'absent')
-        for d in set(curr).difference(orig):
-            yield DeviceEvent(True, d.serial, d.status)
+    def _diff_devices(self, orig: typing.Dict[str, str], curr: typing.Dict[str, str]):
+        for serial in orig:
+            if serial not in curr:
+                yield DeviceEvent(False, serial, 'absent')
+        for serial, status in curr.items():
+            if orig.get(serial) != status:
+                yield DeviceEvent(True, serial, status)
 
     def forward_list(self, serial: Union[None, str] = None) -> List[ForwardItem]:
         with self.make_connection() as c:
@@ -344,15 +407,11 @@ class BaseClient(object):
             c.send_command(list_cmd)
             c.check_okay()
             content = c.read_string_block()
-            items = []
-            for line in content.splitlines():
-                parts = line.split()
-                if len(parts) != 3:
-                    continue
-                if serial and parts[0] != serial:
-                    continue
-                items.append(ForwardItem(*parts))
-            return items
+            return [
+                ForwardItem(*fields)
+                for fields in _FORWARD_LINE_RE.findall(content)
+                if not serial or fields[0] == serial
+            ]
 
     def forward(self, serial, local, remote, norebind=False):
         """
@@ -374,8 +433,8 @@ class BaseClient(object):
 
     @deprecated(deprecated_in="0.15.0",
                 removed_in="1.0.0",
-                details="use Device.reverse instead",
-                current_version=__version__)
+                current_version=__version__,
+                details="use Device.reverse instead")
     def reverse(self, serial, remote, local, norebind=False):
         """
         Args:
@@ -395,8 +454,8 @@ class BaseClient(object):
 
     @deprecated(deprecated_in="0.15.0",
                 removed_in="1.0.0",
-                details="use Device.reverse_list instead",
-                current_version=__version__)
+                current_version=__version__,
+                details="use Device.reverse_list instead")
     def reverse_list(self, serial: str) -> List[ReverseItem]:
         with self.make_connection() as c:
             c.send_command("host:transport:" + serial)
@@ -404,13 +463,7 @@ class BaseClient(object):
             c.send_command("reverse:list-forward")
             c.check_okay()
             content = c.read_string_block()
-            items = []
-            for line in content.splitlines():
-                parts = line.split()
-                if len(parts) != 3:
-                    continue
-                items.append(ReverseItem(*parts[1:]))
-            return items
+            return [ReverseItem(*fields[1:]) for fields in _FORWARD_LINE_RE.findall(content)]
 
 
 
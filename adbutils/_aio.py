@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""asyncio version of the basic device operations, for driving many devices from one thread
+
+The adb server must already be running, it is not started automatically.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import datetime
+import io
+import pathlib
+import stat
+import struct
+import typing
+from typing import Optional, Union
+
+from adbutils._adb import BaseClient
+from adbutils._proto import FileInfo
+from adbutils._utils import list2cmdline
+from adbutils.errors import AdbConnectionError, AdbError, AdbTimeout
+
+_OKAY = b"OKAY"
+_FAIL = b"FAIL"
+_DONE = b"DONE"
+_DATA = b"DATA"
+_SYNC_DATA_MAX = 64 * 1024
+
+
+class AsyncAdbConnection(object):
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def open(cls, host: str, port: int, timeout: float = 3) -> "AsyncAdbConnection":
+        """
+        Raises:
+            AdbTimeout, AdbConnectionError
+        """
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+        except asyncio.TimeoutError:
+            raise AdbTimeout("connect to adb server timeout")
+        except OSError as e:
+            raise AdbConnectionError("connect to adb server failed: %s" % e)
+        return cls(reader, writer)
+
+    async def close(self):
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except OSError:
+            pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        await self.close()
+
+    async def send(self, data: bytes):
+        self.writer.write(data)
+        await self.writer.drain()
+
+    async def send_command(self, cmd: str):
+        cmd_bytes = cmd.encode("utf-8")
+        await self.send(b"%04x" % len(cmd_bytes) + cmd_bytes)
+
+    async def read(self, n: int) -> bytes:
+        """
+        Raises:
+            AdbError when connection closed before n bytes received
+        """
+        try:
+            return await self.reader.readexactly(n)
+        except asyncio.IncompleteReadError:
+            raise AdbError("connection closed")
+
+    async def read_uint32(self) -> int:
+        return struct.unpack("<I", await self.read(4))[0]
+
+    async def read_string_block(self) -> str:
+        size = int(await self.read(4), 16)
+        return (await self.read(size)).decode("utf-8", errors="replace")
+
+    async def read_until_close(self, encoding: str | None = "utf-8") -> Union[str, bytes]:
+        content = await self.reader.read()
+        return content.decode(encoding, errors="replace") if encoding else content
+
+    async def check_okay(self):
+        data = await self.read(4)
+        if data == _FAIL:
+            raise AdbError(await self.read_string_block())
+        elif data == _OKAY:
+            return
+        raise AdbError("Unknown data: %r" % data)
+
+
+class AsyncSync():
+    def __init__(self, device: "AsyncAdbDevice"):
+        self._device = device
+
+    async def _prepare_sync(self, path: str, cmd: str) -> AsyncAdbConnection:
+        c = await self._device.open_transport()
+        try:
+            await c.send_command("sync:")
+            await c.check_okay()
+            # {COMMAND}{LittleEndianPathLength}{Path}
+            path_bytes = path.encode("utf-8")
+            await c.send(cmd.encode("utf-8") + struct.pack("<I", len(path_bytes)) + path_bytes)
+        except BaseException:
+            await c.close()
+            raise
+        return c
+
+    async def exists(self, path: str) -> bool:
+        finfo = await self.stat(path)
+        return finfo.mtime is not None
+
+    async def stat(self, path: str) -> FileInfo:
+        async with await self._prepare_sync(path, "STAT") as c:
+            if await c.read(4) != b"STAT":
+                raise AdbError("Invalid sync response for STAT", path)
+            mode, size, mtime = struct.unpack("<III", await c.read(12))
+            # when mtime is 0, windows will error
+            mdtime = datetime.datetime.fromtimestamp(mtime) if mtime else None
+            return FileInfo(mode, size, mdtime, path)
+
+    async def iter_content(self, path: str) -> typing.AsyncIterator[bytes]:
+        async with await self._prepare_sync(path, "RECV") as c:
+            while True:
+                cmd = await c.read(4)
+                if cmd == _FAIL:
+                    str_size = await c.read_uint32()
+                    error_message = (await c.read(str_size)).decode("utf-8", errors="replace")
+                    raise AdbError(error_message, path)
+                elif cmd == _DONE:
+                    break
+                elif cmd == _DATA:
+                    chunk_size = await c.read_uint32()
+                    yield await c.read(chunk_size)
+                else:
+                    raise AdbError("Invalid sync cmd", cmd)
+
+    async def read_bytes(self, path: str) -> bytes:
+        return b"".join([chunk async for chunk in self.iter_content(path)])
+
+    async def push(self,
+                   src: typing.Union[pathlib.Path, str, bytes, bytearray, typing.BinaryIO],
+                   dst: typing.Union[pathlib.Path, str],
+                   mode: int = 0o755) -> int:
+        """
+        Push file from local:src to device:dst, dst must be a file path
+
+        Returns:
+            total file size pushed
+        """
+        if isinstance(dst, pathlib.Path):
+            dst = dst.as_posix()
+        # file io is blocking, run it in the default executor to keep the event loop free
+        loop = asyncio.get_running_loop()
+        if isinstance(src, (pathlib.Path, str)):
+            src = await loop.run_in_executor(None, pathlib.Path(src).open, "rb")
+        elif isinstance(src, (bytes, bytearray)):
+            src = io.BytesIO(src)
+        elif not hasattr(src, "read"):
+            raise TypeError("Invalid src type: %s" % type(src))
+
+        path = dst + "," + str(stat.S_IFREG | mode)
+        total_size = 0
+        try:
+            async with await self._prepare_sync(path, "SEND") as c:
+                while True:
+                    chunk = await loop.run_in_executor(None, src.read, _SYNC_DATA_MAX)
+                    if not chunk:
+                        break
+                    await c.send(_DATA + struct.pack("<I", len(chunk)) + chunk)
+                    total_size += len(chunk)
+                mtime = int(datetime.datetime.now().timestamp())
+                await c.send(_DONE + struct.pack("<I", mtime))
+                status_msg = await c.read(4)
+                if status_msg != _OKAY:
+                    raise AdbError(status_msg.decode("utf-8", errors="replace"))
+        finally:
+            src.close()
+        return total_size
+
+
+class AsyncAdbDevice:
+    """asyncio version of the basic AdbDevice operations"""
+
+    def __init__(self, client: BaseClient, serial: str = None, transport_id: int = None):
+        """
+        Args:
+            client (BaseClient): AdbClient instance, only host and port are used
+            serial (str): device serial
+            transport_id (int): transport_id
+        """
+        self._client = client
+        self._serial = serial
+        self._transport_id: int = transport_id
+
+        if not serial and not transport_id:
+            raise AdbError("serial, transport_id must set atleast one")
+
+    @property
+    def serial(self) -> str:
+        return self._serial
+
+    def __repr__(self):
+        return "AsyncAdbDevice(serial={})".format(self.serial)
+
+    async def open_transport(self, command: str = None) -> AsyncAdbConnection:
+        c = await AsyncAdbConnection.open(self._client.host, self._client.port)
+        try:
+            if command:
+                if self._transport_id:
+                    await c.send_command(f"host-transport-id:{self._transport_id}:{command}")
+                else:
+                    await c.send_command(f"host-serial:{self._serial}:{command}")
+                await c.check_okay()
+            elif self._transport_id:
+                await c.send_command(f"host:transport-id:{self._transport_id}")
+                await c.check_okay()
+            else:
+                await c.send_command(f"host:tport:serial:{self._serial}")
+                await c.check_okay()
+                await c.read(8)  # skip transport id
+        except BaseException:
+            await c.close()
+            raise
+        return c
+
+    async def _get_with_command(self, cmd: str) -> str:
+        async with await self.open_transport(cmd) as c:
+            return await c.read_string_block()
+
+    async def get_state(self) -> str:
+        """return device state {offline,bootloader,device}"""
+        return await self._get_with_command("get-state")
+
+    async def get_serialno(self) -> str:
+        """return the real device id, not the connect serial"""
+        return await self._get_with_command("get-serialno")
+
+    async def get_features(self) -> str:
+        return await self._get_with_command("features")
+
+    async def shell(self,
+                    cmdargs: Union[str, list, tuple],
+                    timeout: Optional[float] = None,
+                    encoding: str | None = "utf-8",
+                    rstrip=True) -> Union[str, bytes]:
+        """Run shell inside device and get it's content
+
+        Raises:
+            AdbTimeout
+        """
+        if isinstance(cmdargs, (list, tuple)):
+            cmdargs = list2cmdline(cmdargs)
+
+        async def _shell():
+            async with await self.open_transport() as c:
+                await c.send_command("shell:" + cmdargs)
+                await c.check_okay()
+                return await c.read_until_close(encoding=encoding)
+
+        try:
+            output = await asyncio.wait_for(_shell(), timeout)
+        except asyncio.TimeoutError:
+            raise AdbTimeout("adb read timeout")
+        if encoding and rstrip:
+            return output.rstrip()
+        return output
+
+    @property
+    def sync(self) -> AsyncSync:
+        return AsyncSync(self)
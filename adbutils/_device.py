@@ -5,26 +5,27 @@
 
 from __future__ import annotations
 
+import functools
 import pathlib
 import re
 import socket
-import subprocess
+import struct
 import threading
+import time
 import typing
 from typing import List, Optional, Union
 
 from PIL import Image, UnidentifiedImageError
-from deprecation import deprecated
 
 from adbutils._deprecated import DeprecatedExtension
 from adbutils.install import InstallExtension
 from adbutils.screenrecord import ScreenrecordExtension
 from adbutils.screenshot import ScreenshotExtesion
 
-from adbutils._adb import AdbConnection, BaseClient
+from adbutils._adb import _FORWARD_LINE_RE, AdbConnection, BaseClient
 from adbutils._proto import *
 from adbutils._proto import StrOrPathLike
-from adbutils._utils import StopEvent, adb_path, get_free_port, list2cmdline
+from adbutils._utils import StopEvent, adb_path, deprecated, get_free_port, list2cmdline
 from adbutils._version import __version__
 from adbutils.errors import AdbError
 from adbutils.shell import ShellExtension
@@ -32,6 +33,50 @@ from adbutils.sync import Sync
 
 
 _DEFAULT_SOCKET_TIMEOUT = 600  # 10 minutes
+_FORWARD_CACHE_TTL = 1.0  # seconds forward_port trust the last forward_list result
+
+# output line of "getprop", eg: [ro.product.model]: [Pixel 5]
+_GETPROP_RE = re.compile(r"^\[([^\]]+)\]:\s*\[(.*)\]\r?$", re.M)
+
+# shell protocol v2 packet: id(1 byte) + length(uint32) + data
+_SHELL_V2_HEADER = struct.Struct("<BI")
+_SHELL_V2_STDOUT = 1
+_SHELL_V2_STDERR = 2
+_SHELL_V2_EXIT = 3
+
+# service prefix of create_connection, unix is the same as localabstract
+_NETWORK_PREFIX = {
+    Network.TCP: "tcp:",
+    Network.UNIX: "localabstract:",
+    Network.LOCAL_ABSTRACT: "localabstract:",
+    Network.LOCAL_FILESYSTEM: "localfilesystem:",
+    Network.LOCAL: "local:",
+    Network.DEV: "dev:",
+    Network.LOCAL_RESERVED: "localreserved:",
+}
+
+# FAIL message of a service the device does not know, "error: closed" on old adb servers
+_UNKNOWN_SERVICE_ERRORS = ("closed", "error: closed")
+
+# framebuffer header: version, bpp, size, width, height, then offset and length of red, blue, green, alpha
+_FB_HEADER = struct.Struct("<13I")
+
+# any escape (\\w, \\xe4, \\N{...}), "." and "[^" can match differently on str and on utf-8 bytes
+_UNICODE_SENSITIVE_RE = re.compile(r"\\|\.|\[\^")
+
+
+def _is_bytes_safe_pattern(pattern: re.Pattern) -> bool:
+    """ whether a str pattern matches the same lines when compiled as bytes """
+    if not pattern.pattern.isascii():
+        return False
+    if pattern.flags & re.IGNORECASE and not pattern.flags & re.ASCII:
+        return False
+    return _UNICODE_SENSITIVE_RE.search(pattern.pattern) is None
+
+
+def _normalize_cmd(cmdargs: Union[str, list, tuple]) -> str:
+    """ argv list or tuple to a shell command line, str is returned unchanged """
+    return cmdargs if isinstance(cmdargs, str) else list2cmdline(cmdargs)
 
 
 class BaseDevice:
@@ -50,10 +95,27 @@ class BaseDevice:
         self._serial = serial
         self._transport_id: int = transport_id
         self._properties = {}  # store properties data
+        self._forward_cache = None  # (time.monotonic(), forward_list result)
+        self._exec_unsupported = False  # set when device rejects exec: (before Android 5.0)
+        self._feature_set = None  # cached get_features() result, see _has_feature
+        self._wm_size_cache = None  # (time.monotonic(), "wm size" result), see ShellExtension.window_size
+        self._rotation_cache = None  # (time.monotonic(), rotation)
+        self._app_current_cache = None  # (time.monotonic(), app_current result)
+        self._grep_supported = None  # whether device shell has grep, see ShellExtension._has_grep
 
         if not serial and not transport_id:
             raise AdbError("serial, transport_id must set atleast one")
 
+        # open_transport commands only depend on serial or transport_id, build them once
+        if transport_id:
+            self._command_prefix = f"host-transport-id:{transport_id}:"
+            self._transport_command = f"host:transport-id:{transport_id}"
+        else:
+            self._command_prefix = f"host-serial:{serial}:"
+            # host:tport:serial:xxx is also fine, but receive 12 bytes
+            # recv: 4f 4b 41 59 14 00 00 00 00 00 00 00              OKAY........
+            self._transport_command = f"host:tport:serial:{serial}"
+
         self._prepare()
 
     def _prepare(self):
@@ -70,31 +132,18 @@ class BaseDevice:
         c = self._client.make_connection(timeout=timeout)
 
         if command:
-            if self._transport_id:
-                c.send_command(f"host-transport-id:{self._transport_id}:{command}")
-                c.check_okay()
-            elif self._serial:
-                c.send_command(f"host-serial:{self._serial}:{command}")
-                c.check_okay()
-            else:
-                raise RuntimeError("should not reach here")
+            c.send_command(self._command_prefix + command)
+            c.check_okay()
         else:
-            if self._transport_id:
-                c.send_command(f"host:transport-id:{self._transport_id}")
-                c.check_okay()
-            elif self._serial:
-                # host:tport:serial:xxx is also fine, but receive 12 bytes
-                # recv: 4f 4b 41 59 14 00 00 00 00 00 00 00              OKAY........
-                c.send_command(f"host:tport:serial:{self._serial}")
-                c.check_okay()
-                c.read(8)  # skip 8 bytes
-            else:
-                raise RuntimeError("should not reach here")
+            c.send_command(self._transport_command)
+            c.check_okay()
+            if not self._transport_id:
+                c.read(8)  # skip 8 bytes of host:tport transport id
         return c
 
     def _get_with_command(self, cmd: str) -> str:
-        c = self.open_transport(cmd)
-        return c.read_string_block()
+        with self.open_transport(cmd) as c:
+            return c.read_string_block()
 
     def get_state(self) -> str:
         """return device state {offline,bootloader,device}"""
@@ -115,45 +164,69 @@ class BaseDevice:
         """
         return self._get_with_command("features")
 
+    def _has_feature(self, name: str) -> bool:
+        """check device feature, features are asked only once per device"""
+        if self._feature_set is None:
+            try:
+                self._feature_set = frozenset(self.get_features().split(","))
+            except AdbError:
+                # remember the failure too, features are not asked again
+                self._feature_set = frozenset()
+        return name in self._feature_set
+
     @property
     def info(self) -> dict:
-        return {
-            "serialno": self.get_serialno(),
-            "devpath": self.get_devpath(),
-            "state": self.get_state(),
-        }
+        # three independent requests, one connection each, wait for them together
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            serialno = executor.submit(self.get_serialno)
+            devpath = executor.submit(self.get_devpath)
+            state = executor.submit(self.get_state)
+            return {
+                "serialno": serialno.result(),
+                "devpath": devpath.result(),
+                "state": state.result(),
+            }
 
     def __repr__(self):
         return "AdbDevice(serial={})".format(self.serial)
 
-    @property
+    @functools.cached_property
     def sync(self) -> Sync:
+        # Sync keeps no state between calls, one instance per device is enough
         return Sync(self._client, self.serial)
 
     @property
     def prop(self) -> "Property":
         return Property(self)
 
-    def adb_output(self, *args, **kwargs):
+    def adb_output(self, *args, raise_error: bool = True):
         """Run adb command use subprocess and get its content
 
+        Args:
+            raise_error (bool): raise EnvironmentError when adb exit with non-zero code,
+                otherwise None is returned
+
         Returns:
             string of output
 
         Raises:
             EnvironmentError
         """
+        import subprocess  # not needed by import adbutils, load on first use
+
         cmds = [adb_path(), "-s", self._serial] if self._serial else [adb_path()]
-        cmds.extend(args)
-        try:
-            return subprocess.check_output(
-                cmds, stdin=subprocess.DEVNULL, stderr=subprocess.STDOUT
-            ).decode("utf-8")
-        except subprocess.CalledProcessError as e:
-            if kwargs.get("raise_error", True):
-                raise EnvironmentError(
-                    "subprocess", cmds, e.output.decode("utf-8", errors="ignore")
-                )
+        cmds.extend(map(str, args))  # argv list, no intermediate shell process
+        p = subprocess.run(
+            cmds, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.STDOUT
+        )
+        if p.returncode == 0:
+            return p.stdout.decode("utf-8")
+        if raise_error:
+            raise EnvironmentError(
+                "subprocess", " ".join(cmds), p.stdout.decode("utf-8", errors="ignore")
+            )
 
     def shell(
         self,
@@ -184,19 +257,37 @@ class BaseDevice:
             shell(["ls", "-l"])
             shell("ls | grep data")
         """
-        if isinstance(cmdargs, (list, tuple)):
-            cmdargs = list2cmdline(cmdargs)
+        cmdargs = _normalize_cmd(cmdargs)
         if stream:
             timeout = None
         c = self.open_transport(timeout=timeout)
-        c.send_command("shell:" + cmdargs)
-        c.check_okay()
         if stream:
+            c.send_command("shell:" + cmdargs)
+            c.check_okay()
             return c
-        output = c.read_until_close(encoding=encoding)
-        if encoding:
-            return output.rstrip() if rstrip else output
-        return output
+        with c:
+            c.send_command("shell:" + cmdargs)
+            c.check_okay()
+            return c.read_until_close(encoding=encoding, rstrip=rstrip)
+
+    def _exec_out(self, cmdargs: Union[str, list, tuple], encoding: Optional[str] = "utf-8") -> Union[str, bytes]:
+        """like shell, but run with exec: which allocates no pty on device,
+        so binary output is received unchanged, set encoding to None to get bytes.
+        fallback to shell: when exec: is not supported
+        """
+        if not self._exec_unsupported:
+            with self.open_transport() as c:
+                c.send_command("exec:" + _normalize_cmd(cmdargs))
+                try:
+                    c.check_okay()
+                except AdbError as e:
+                    # adbd before Android 5.0 closes unknown services, other errors (offline, unauthorized) are raised
+                    if str(e) not in _UNKNOWN_SERVICE_ERRORS:
+                        raise
+                    self._exec_unsupported = True
+                else:
+                    return c.read_until_close(encoding=encoding, rstrip=True)
+        return self.shell(cmdargs, encoding=encoding)
 
     def shell2(
         self,
@@ -219,29 +310,69 @@ class BaseDevice:
         Raises:
             AdbTimeout
         """
-        if isinstance(cmdargs, (list, tuple)):
-            cmdargs = list2cmdline(cmdargs)
-        assert isinstance(cmdargs, str)
-        MAGIC = "X4EXIT:"
-        newcmd = cmdargs + f"; echo {MAGIC}$?"
-        output = self.shell(newcmd, timeout=timeout, encoding=encoding, rstrip=True)
-        rindex = output.rfind(MAGIC if encoding else MAGIC.encode())
-        if rindex == -1:  # normally will not possible
-            raise AdbError("shell output invalid", newcmd, output)
-        returncoode = int(output[rindex + len(MAGIC) :])
-        output = output[:rindex]
-        if rstrip and encoding:
-            output = output.rstrip()
+        cmdargs = _normalize_cmd(cmdargs)
+        if self._has_feature("shell_v2"):
+            # exit code comes in its own packet, no marker echo needed
+            data, returncoode = self._shell_v2(cmdargs, timeout)
+            view = memoryview(data)
+        else:
+            MAGIC = b"X4EXIT:"
+            newcmd = cmdargs + "; echo X4EXIT:$?"
+            with self.open_transport(timeout=timeout) as c:
+                c.send_command("shell:" + newcmd)
+                c.check_okay()
+                data = c.read_until_close(encoding=None)
+            # the marker line is the last one, only scan the tail for it
+            rindex = data.rfind(MAGIC, max(0, len(data) - 64))
+            if rindex == -1:  # normally will not possible
+                raise AdbError("shell output invalid", newcmd, data)
+            returncoode = int(data[rindex + len(MAGIC):])
+            view = memoryview(data)[:rindex]
+        if encoding:
+            # decode straight from the view, no copy of the raw output
+            output = str(view, encoding, errors="replace")
+            if rstrip:
+                output = output.rstrip()
+        else:
+            output = bytes(view)
         return ShellReturn(command=cmdargs, returncode=returncoode, output=output)
 
+    def _shell_v2(self, cmdargs: str, timeout: Optional[float]) -> typing.Tuple[bytearray, int]:
+        """run command with shell protocol v2
+
+        Returns:
+            (stdout and stderr in received order, exit code)
+        """
+        output = bytearray()
+        with self.open_transport(timeout=timeout) as c:
+            c.send_command("shell,v2:" + cmdargs)
+            c.check_okay()
+            while True:
+                header = c.read(_SHELL_V2_HEADER.size)
+                if len(header) != _SHELL_V2_HEADER.size:
+                    raise AdbError("shell closed without exit code", cmdargs)
+                kind, size = _SHELL_V2_HEADER.unpack(header)
+                data = c.read(size)
+                if kind == _SHELL_V2_EXIT:
+                    if len(data) != 1:
+                        raise AdbError("invalid shell exit packet", cmdargs, data)
+                    return output, data[0]
+                if kind == _SHELL_V2_STDOUT or kind == _SHELL_V2_STDERR:
+                    output += data
+
     def forward(self, local: str, remote: str, norebind: bool = False):
+        self._forward_cache = None
         self._client.forward(self._serial, local, remote, norebind)
 
     def forward_port(self, remote: Union[int, str]) -> int:
         """forward remote port to local random port"""
         if isinstance(remote, int):
             remote = "tcp:" + str(remote)
-        for f in self.forward_list():
+        if self._forward_cache and time.monotonic() - self._forward_cache[0] < _FORWARD_CACHE_TTL:
+            items = self._forward_cache[1]
+        else:
+            items = self.forward_list()
+        for f in items:
             if (
                 f.serial == self._serial
                 and f.remote == remote
@@ -254,7 +385,9 @@ class BaseDevice:
 
     def forward_list(self) -> List[ForwardItem]:
         items = self._client.forward_list()
-        return [item for item in items if item.serial == self._serial]
+        items = [item for item in items if item.serial == self._serial]
+        self._forward_cache = (time.monotonic(), items)
+        return list(items)
 
     def reverse(self, remote: str, local: str, norebind: bool = False):
         """
@@ -270,27 +403,21 @@ class BaseDevice:
         Raises:
             AdbError
         """
-        c = self.open_transport()
         args = ["reverse:forward"]
         if norebind:
             args.append("norebind")
         args.append(remote + ";" + local)
-        c.send_command(":".join(args))
-        c.check_okay() # this OKAY means message was received
-        c.check_okay() # check reponse
+        with self.open_transport() as c:
+            c.send_command(":".join(args))
+            c.check_okay() # this OKAY means message was received
+            c.check_okay() # check reponse
 
     def reverse_list(self) -> List[ReverseItem]:
-        c = self.open_transport()
-        c.send_command("reverse:list-forward")
-        c.check_okay()
-        content = c.read_string_block()
-        items = []
-        for line in content.splitlines():
-            parts = line.split()
-            if len(parts) != 3:
-                continue
-            items.append(ReverseItem(*parts[1:]))
-        return items
+        with self.open_transport() as c:
+            c.send_command("reverse:list-forward")
+            c.check_okay()
+            content = c.read_string_block()
+        return [ReverseItem(*fields[1:]) for fields in _FORWARD_LINE_RE.findall(content)]
     
     def framebuffer(self) -> Image.Image:
         """Capture device screen and return PIL.Image object (Not very stable)
@@ -300,43 +427,42 @@ class BaseDevice:
         """
         # Ref: https://android.googlesource.com/platform/system/core/+/android-cts-7.0_r18/adb/framebuffer_service.cpp
         # Ref: https://github.com/DeviceFarmer/adbkit/blob/c16081384ca34addbdab318bda3c76434b7538af/src/adb/command/host-transport/framebuffer.ts
-        c = self.open_transport()
-        c.send_command("framebuffer:")
-        c.check_okay()
-        
-        version = c.read_uint32()
-        if version == 16:
-            raise NotImplementedError("Unsupported version 16")
-        bpp = c.read_uint32() # bits per pixel
-        if bpp != 24 and bpp != 32:
-            raise NotImplementedError("Unsupported bpp(bits per pixel)", bpp)
-        size = c.read_uint32()
-        if size == 1:
-            # FIXME: what is this?
-            size = c.read_uint32()
-        width = c.read_uint32()
-        height = c.read_uint32()
-        red_offset = c.read_uint32()
-        red_length = c.read_uint32() # always 8
-        blue_offset = c.read_uint32()
-        blue_length = c.read_uint32() # always 8
-        green_offset = c.read_uint32()
-        green_length = c.read_uint32() # always 8
-        alpha_offset = c.read_uint32()
-        alpha_length = c.read_uint32()
-
-        color_format = 'RGB'
-        if blue_offset == 0:
-            color_format = 'BGR'
-        if bpp == 32 or alpha_length:
-            color_format += 'A'
-
-        if color_format != 'RGBA' and color_format != 'RGB':
-            raise NotImplementedError("Unsupported color format")
-        buffer = c.read(size)
-        if len(buffer) != size:
-            raise UnidentifiedImageError("framebuffer size not match", size, len(buffer))
-        image = Image.frombytes(color_format, (width, height), buffer)
+        with self.open_transport() as c:
+            c.send_command("framebuffer:")
+            c.check_okay()
+
+            # read the whole header at once instead of one recv per field
+            header = c.read(_FB_HEADER.size)
+            if len(header) != _FB_HEADER.size:
+                raise AdbError("connection closed")
+            fields = _FB_HEADER.unpack(header)
+            version, bpp = fields[:2]
+            if version == 16:
+                raise NotImplementedError("Unsupported version 16")
+            if bpp != 24 and bpp != 32:
+                raise NotImplementedError("Unsupported bpp(bits per pixel)", bpp)
+            if version == 2:
+                # version 2 inserts colorspace after bpp
+                fields = fields[:2] + fields[3:] + (c.read_uint32(),)
+            (size, width, height,
+             red_offset, red_length,  # lengths are always 8
+             blue_offset, blue_length,
+             green_offset, green_length,
+             alpha_offset, alpha_length) = fields[2:]
+
+            color_format = 'RGB'
+            if blue_offset == 0:
+                color_format = 'BGR'
+            if bpp == 32 or alpha_length:
+                color_format += 'A'
+
+            buffer = c.read(size)
+            if len(buffer) != size:
+                raise UnidentifiedImageError("framebuffer size not match", size, len(buffer))
+
+        # BGR(A) is swapped by the PIL raw decoder, RGBA buffer is used without copy
+        mode = 'RGBA' if color_format.endswith('A') else 'RGB'
+        image = Image.frombuffer(mode, (width, height), buffer, "raw", color_format, 0, 1)
         return image
 
     @deprecated(deprecated_in="2.6.0", removed_in="3.0.0", current_version=__version__, details="use sync.push instead")
@@ -356,25 +482,16 @@ class BaseDevice:
         Raises:
             AssertionError, ValueError
         """
-        c = self.open_transport()
+        prefix = _NETWORK_PREFIX.get(network)
+        if prefix is None:
+            raise ValueError("Unsupported network type", network)
         if network == Network.TCP:
             assert isinstance(address, int)
-            c.send_command("tcp:" + str(address))
-            c.check_okay()
-        elif network in [Network.UNIX, Network.LOCAL_ABSTRACT]:
-            assert isinstance(address, str)
-            c.send_command("localabstract:" + address)
-            c.check_okay()
-        elif network in [
-            Network.LOCAL_FILESYSTEM,
-            Network.LOCAL,
-            Network.DEV,
-            Network.LOCAL_RESERVED,
-        ]:
-            c.send_command(network + ":" + address)
-            c.check_okay()
         else:
-            raise ValueError("Unsupported network type", network)
+            assert isinstance(address, str)
+        c = self.open_transport()
+        c.send_command(prefix + str(address))
+        c.check_okay()
         c._finalizer.detach()
         return c.conn
 
@@ -385,10 +502,10 @@ class BaseDevice:
             cannot run as root in production builds
         """
         # Ref: https://github.com/Swind/pure-python-adb/blob/master/ppadb/command/transport/__init__.py#L179
-        c = self.open_transport()
-        c.send_command("root:")
-        c.check_okay()
-        return c.read_until_close()
+        with self.open_transport() as c:
+            c.send_command("root:")
+            c.check_okay()
+            return c.read_until_close()
 
     def tcpip(self, port: int):
         """restart adbd listening on TCP on PORT
@@ -396,23 +513,23 @@ class BaseDevice:
         Return example:
             restarting in TCP mode port: 5555
         """
-        c = self.open_transport()
-        c.send_command("tcpip:" + str(port))
-        c.check_okay()
-        return c.read_until_close()
+        with self.open_transport() as c:
+            c.send_command("tcpip:" + str(port))
+            c.check_okay()
+            return c.read_until_close()
 
     def logcat(
         self,
         file: StrOrPathLike = None,
         clear: bool = False,
-        re_filter: typing.Union[str, re.Pattern] = None,
+        re_filter: typing.Union[str, bytes, re.Pattern] = None,
         command: str = "logcat -v time",
     ) -> StopEvent:
         """
         Args:
             file (str): file path to save logcat
             clear (bool): clear logcat before start
-            re_filter (str | re.Pattern): regex pattern to filter logcat
+            re_filter (str | bytes | re.Pattern): regex pattern to filter logcat
             command (str): logcat command, default is "logcat -v time"
 
         Example usage:
@@ -420,46 +537,62 @@ class BaseDevice:
             >>> time.sleep(10)
             >>> evt.stop()
         """
+        filter_func = None
         if re_filter:
-            if isinstance(re_filter, str):
+            if isinstance(re_filter, (str, bytes)):
                 re_filter = re.compile(re_filter)
             assert isinstance(re_filter, re.Pattern)
+            if isinstance(re_filter.pattern, bytes):
+                filter_func = re_filter.search
+            elif _is_bytes_safe_pattern(re_filter):
+                # filter undecoded lines, saves a decode and an encode of every line
+                filter_func = re.compile(re_filter.pattern.encode("utf-8"), re_filter.flags & ~re.UNICODE).search
+            else:
+                # escapes and non-ascii patterns only make sense on decoded text
+                str_search = re_filter.search
+                filter_func = lambda line: str_search(line.decode("utf-8", errors="replace"))
 
         if clear:
             self.shell("logcat --clear")
 
-        def _filter_func(line: str) -> bool:
-            if re_filter is None:
-                return True
-            return re_filter.search(line) is not None
-
         def _copy2file(
             stream: AdbConnection,
-            fdst: typing.TextIO,
+            fdst: typing.IO,
             event: StopEvent,
-            filter_func: typing.Callable[[str], bool],
+            filter_func: typing.Optional[typing.Callable[[bytes], typing.Any]],
         ):
             try:
-                fsrc = stream.conn.makefile("r", encoding="UTF-8", errors="replace")
-                while not event.is_stopped():
-                    line = fsrc.readline()
-                    if not line:
-                        break
-                    if filter_func(line):
-                        fdst.write(line)
+                if filter_func is None:
+                    # nothing to filter, copy raw bytes with one write per recv instead of per line
+                    buf = bytearray(1 << 16)
+                    view = memoryview(buf)
+                    while not event.is_stopped():
+                        n = stream.conn.recv_into(buf)
+                        if not n:
+                            break
+                        fdst.write(view[:n])
                         fdst.flush()
+                else:
+                    with stream.conn.makefile("rb") as fsrc:
+                        while not event.is_stopped():
+                            line = fsrc.readline()
+                            if not line:
+                                break
+                            if filter_func(line) is not None:
+                                fdst.write(line)
+                                fdst.flush()
             finally:
-                fsrc.close()
                 stream.close()
+                fdst.close()
                 event.done()
 
         event = StopEvent()
         stream = self.shell(command, stream=True)
-        fdst = pathlib.Path(file).open("w", encoding="UTF-8")
+        fdst = pathlib.Path(file).open("wb")
         threading.Thread(
             name="logcat",
             target=_copy2file,
-            args=(stream, fdst, event, _filter_func),
+            args=(stream, fdst, event, filter_func),
             daemon=True,
         ).start()
         return event
@@ -474,11 +607,19 @@ class Property:
         return f"product:{self.name} model:{self.model} device:{self.device}"
 
     def get(self, name: str, cache=True) -> str:
-        if cache and name in self._d._properties:
-            return self._d._properties[name]
-        value = self._d._properties[name] = self._d.shell(["getprop", name]).strip()
+        if cache:
+            if not self._d._properties:
+                self._load_all()
+            if name in self._d._properties:
+                return self._d._properties[name]
+        value = self._d._properties[name] = self._d._exec_out(["getprop", name]).strip()
         return value
 
+    def _load_all(self):
+        """ fetch all properties with a single getprop call """
+        output = self._d._exec_out("getprop")
+        self._d._properties.update(_GETPROP_RE.findall(output))
+
     @property
     def name(self):
         return self.get("ro.product.name", cache=True)
@@ -1,15 +1,18 @@
+import functools
 import hashlib
 import importlib.resources
 import os
+import queue
 import random
 import shlex
 import socket
-import subprocess
 import sys
 import tempfile
+import textwrap
 import threading
 import time
 import typing
+import warnings
 import zipfile
 import typing
 import pathlib
@@ -66,6 +69,21 @@ def list2cmdline(args: typing.Union[list, tuple]):
     return ' '.join(map(shlex.quote, args))
 
 
+@functools.lru_cache(maxsize=None)
+def http_session():
+    """ shared requests.Session, keep-alive connections are reused between downloads """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util import Retry
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=8,
+                          max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504]))
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
 def current_ip():
     s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
     try:
@@ -93,12 +111,19 @@ def adb_path():
     # 0. check env: ADBUTILS_ADB_PATH
     if os.getenv("ADBUTILS_ADB_PATH"):
         return os.getenv("ADBUTILS_ADB_PATH")
-        
+    return _find_adb_exe()
+
+
+@functools.lru_cache(maxsize=1)
+def _find_adb_exe() -> str:
+    # every candidate is checked by running "adb version", search only once per process
+    # AdbError is not cached, the search is retried on next call
+
     # 1. find in $PATH
     exe = which("adb")
     if exe and _is_valid_exe(exe):
         return exe
-    
+
     # 2. use buildin adb
     bin_dir = _get_bin_dir()
     exe = os.path.join(bin_dir, "adb.exe" if os.name == 'nt' else 'adb')
@@ -109,6 +134,8 @@ def adb_path():
 
 
 def _popen_kwargs(prevent_sigint=False):
+    import subprocess
+
     startupinfo = None
     preexec_fn = None
     creationflags = 0
@@ -131,6 +158,8 @@ def _popen_kwargs(prevent_sigint=False):
 
 
 def _is_valid_exe(exe: str):
+    import subprocess  # subprocess is slow to import, only load it when adb is searched
+
     cmd = [exe, "version"]
     try:
         subprocess.check_call(
@@ -146,14 +175,19 @@ class ReadProgress():
     def __init__(self, r, total_size: int, source_path=None):
         """
         Args:
+            r: file object or iterator of bytes chunks (eg: resp.iter_content)
             source_path (str): store read content to filepath
         """
         self.r = r
+        self._pending = b''  # unread part of the last chunk when r is an iterator
+        self._offset = 0
         self.total = total_size
         self.copied = 0
         self.start_time = time.time()
         self.update_time = time.time()
         self.m = hashlib.md5()
+        self._hash_queue = queue.SimpleQueue()
+        self._hash_thread = None
         self._chunk_size = 0
         self._hash = ''
         self._tmpfd = None if source_path else tempfile.NamedTemporaryFile(suffix=".apk")
@@ -161,8 +195,14 @@ class ReadProgress():
 
     def update(self, chunk: bytes):
         chunk_size = len(chunk)
-        self.m.update(chunk)
-        if chunk_size == 0:
+        if chunk_size:
+            # md5 runs in a worker thread, so hashing overlaps with sending the next chunk
+            if self._hash_thread is None:
+                self._hash_thread = threading.Thread(name="md5", target=self._hash_worker, daemon=True)
+                self._hash_thread.start()
+            self._hash_queue.put(chunk)
+        else:
+            self._stop_hash_thread()
             self._hash = self.m.hexdigest()
         self.copied += chunk_size
         self._chunk_size += chunk_size
@@ -189,8 +229,46 @@ class ReadProgress():
             print("{:.1f}%\t{} [{}/{}]".format(percent, speed, copysize,
                                                totalsize))
 
-    def read(self, n: int) -> bytes:
-        chunk = self.r.read(n)
+    def _stop_hash_thread(self):
+        if self._hash_thread is not None:
+            self._hash_queue.put(None)
+            self._hash_thread.join()
+            self._hash_thread = None
+
+    def close(self):
+        """ stop the md5 worker and close the source, safe to call after a failed transfer """
+        self._stop_hash_thread()
+        if hasattr(self.r, "close"):
+            self.r.close()
+
+    def _hash_worker(self):
+        while True:
+            chunk = self._hash_queue.get()
+            if chunk is None:
+                break
+            self.m.update(chunk)
+
+    def _read(self, n: typing.Optional[int] = -1) -> bytes:
+        if hasattr(self.r, "read"):
+            return self.r.read(n)
+        if n is None or n < 0:
+            # same as file.read(), the rest of the content
+            chunks = [self._pending[self._offset:]]
+            chunks.extend(self.r)
+            self._pending, self._offset = b'', 0
+            return b''.join(chunks)
+        while self._offset >= len(self._pending):
+            self._pending = next(self.r, None)
+            self._offset = 0
+            if self._pending is None:
+                self._pending = b''
+                return b''
+        chunk = self._pending[self._offset:self._offset + n]
+        self._offset += len(chunk)
+        return chunk
+
+    def read(self, n: typing.Optional[int] = -1) -> bytes:
+        chunk = self._read(n)
         self.update(chunk)
         if self._tmpfd:
             self._tmpfd.write(chunk)
@@ -206,15 +284,30 @@ class ReadProgress():
 class APKReader:
     def __init__(self, fp: typing.BinaryIO):
         self._fp = fp
-    
+        self._manifest = None
+
+    def manifest(self) -> Manifest:
+        """
+        Parse AndroidManifest.xml once, other entries of the apk are not read
+
+        Raises:
+            AdbError
+        """
+        if self._manifest is None:
+            with zipfile.ZipFile(self._fp) as zf:
+                raw_manifest = zf.read("AndroidManifest.xml")
+            axml = AXML(raw_manifest)
+            if not axml.is_valid:
+                raise AdbError("axml is invalid")
+            self._manifest = Manifest(axml.get_xml())
+        return self._manifest
+
     def dump_info(self):
-        zf = zipfile.ZipFile(self._fp)
-        raw_manifest = zf.read("AndroidManifest.xml")
-        axml = AXML(raw_manifest)
-        if not axml.is_valid:
-            print("axml is invalid")
+        try:
+            am = self.manifest()
+        except AdbError as e:
+            print(e)
             return
-        am = Manifest(axml.get_xml())
         print("package:", am.package_name)
         print("main-activity:", am.main_activity)
         print("version-name:", am.version_name)
@@ -256,6 +349,43 @@ class StopEvent:
         self.__done.clear()
 
 
+_ESCAPE_TABLE = str.maketrans({
+    "-": r"\-",
+    "+": r"\+",
+    "[": r"\[",
+    "]": r"\]",
+    "(": r"\(",
+    ")": r"\)",
+    "{": r"\{",
+    "}": r"\}",
+    "\\": r"\\\\",
+    "^": r"\^",
+    "$": r"\$",
+    "*": r"\*",
+    ".": r"\.",
+    ",": r"\,",
+    ":": r"\:",
+    "~": r"\~",
+    ";": r"\;",
+    ">": r"\>",
+    "<": r"\<",
+    "%": r"\%",
+    "#": r"\#",
+    "\'": r"\\'",
+    "\"": r'\\"',
+    "`": r"\`",
+    "!": r"\!",
+    "?": r"\?",
+    "|": r"\|",
+    "=": r"\=",
+    "@": r"\@",
+    "/": r"\/",
+    "_": r"\_",
+    " ": r"%s",  # special
+    "&": r"\&"
+})
+
+
 def escape_special_characters(text: str) -> str:
     """
     A helper that escape special characters
@@ -263,40 +393,51 @@ def escape_special_characters(text: str) -> str:
     Args:
         text: str
     """
-    escaped = text.translate(
-        str.maketrans({
-            "-": r"\-",
-            "+": r"\+",
-            "[": r"\[",
-            "]": r"\]",
-            "(": r"\(",
-            ")": r"\)",
-            "{": r"\{",
-            "}": r"\}",
-            "\\": r"\\\\",
-            "^": r"\^",
-            "$": r"\$",
-            "*": r"\*",
-            ".": r"\.",
-            ",": r"\,",
-            ":": r"\:",
-            "~": r"\~",
-            ";": r"\;",
-            ">": r"\>",
-            "<": r"\<",
-            "%": r"\%",
-            "#": r"\#",
-            "\'": r"\\'",
-            "\"": r'\\"',
-            "`": r"\`",
-            "!": r"\!",
-            "?": r"\?",
-            "|": r"\|",
-            "=": r"\=",
-            "@": r"\@",
-            "/": r"\/",
-            "_": r"\_",
-            " ": r"%s",  # special
-            "&": r"\&"
-        }))
-    return escaped
+    return text.translate(_ESCAPE_TABLE)
+
+
+def deprecated(deprecated_in: str, removed_in: str, current_version: str = None, details: str = ""):
+    """
+    Same usage as deprecation.deprecated, but the deprecation package and the
+    version comparison are only loaded on the first call of the decorated function.
+    Repeated warnings are handled by the warnings module (once per call site by default)
+    """
+    def decorator(fn):
+        note = ".. deprecated:: %s\n   This will be removed in %s." % (deprecated_in, removed_in)
+        if details:
+            note += " " + details
+        first, _, rest = (fn.__doc__ or "").partition("\n")
+        doc = (first.strip() + "\n" + textwrap.dedent(rest)).strip()
+        fn.__doc__ = doc + "\n\n" + note if doc else note
+
+        warning_class = None  # resolved on first call, False when no warning is needed
+
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            nonlocal warning_class
+            if warning_class is None:
+                warning_class = _deprecation_warning_class(deprecated_in, removed_in, current_version)
+            if warning_class:
+                warnings.warn(warning_class(fn.__name__, deprecated_in, removed_in, details),
+                              category=DeprecationWarning, stacklevel=2)
+            return fn(*args, **kwargs)
+        return inner
+    return decorator
+
+
+def _deprecation_warning_class(deprecated_in: str, removed_in: str, current_version: typing.Optional[str]):
+    """ same rules as deprecation.deprecated, return False when not deprecated yet """
+    from deprecation import DeprecatedWarning, UnsupportedWarning
+    from packaging import version
+
+    try:
+        current = version.parse(current_version) if current_version else None
+    except version.InvalidVersion:  # "unknown" when adbutils is not installed
+        current = None
+    if current is None:
+        return DeprecatedWarning
+    if current >= version.parse(removed_in):
+        return UnsupportedWarning
+    if current >= version.parse(deprecated_in):
+        return DeprecatedWarning
+    return False
@@ -6,16 +6,14 @@
 
 import abc
 import os
-import re
 import time
 import typing
 
-import requests
-import apkutils2
 from retry import retry
-from adbutils.errors import AdbInstallError
+from adbutils.errors import AdbError, AdbInstallError
 from adbutils.sync import Sync
-from adbutils._utils import humanize, ReadProgress
+from adbutils._utils import APKReader, humanize, http_session, list2cmdline, ReadProgress
+from adbutils._adb import AdbConnection
 
 
 class AbstractDevice(abc.ABC):
@@ -23,6 +21,14 @@ class AbstractDevice(abc.ABC):
     def shell(self, cmd: str) -> str:
         pass
 
+    @abc.abstractmethod
+    def open_transport(self, command: str = None, timeout: float = None) -> AdbConnection:
+        pass
+
+    @abc.abstractmethod
+    def _has_feature(self, name: str) -> bool:
+        pass
+
     @property
     @abc.abstractmethod
     def sync(self) -> Sync:
@@ -49,7 +55,9 @@ class InstallExtension(AbstractDevice):
                 uninstall: bool = False,
                 silent: bool = False,
                 callback: typing.Callable[[str], None] = None,
-                flags: list = ["-r", "-t"]):
+                flags: list = ["-r", "-t"],
+                verify: bool = False,
+                stream: bool = False):
         """
         Install APK to device
 
@@ -60,54 +68,78 @@ class InstallExtension(AbstractDevice):
             silent: disable log message print
             callback: only two event now: <"BEFORE_INSTALL" | "FINALLY">
             flags (list): default ["-r", "-t"]
+            verify: compare md5sum of the pushed apk with the local one
+            stream: pipe apk into "cmd package install" instead of push + "pm install",
+                fallback to push when device not support "cmd"
 
         Raises:
-            AdbInstallError, BrokenPipeError
+            AdbError, AdbInstallError, BrokenPipeError
         """
-        if re.match(r"^https?://", path_or_url):
-            resp = requests.get(path_or_url, stream=True)
+        def _dprint(*args):
+            if not silent:
+                print(*args)
+
+        if stream and not self._has_feature("cmd"):
+            _dprint("device not support cmd, fallback to push install")
+            stream = False
+
+        is_url = path_or_url.startswith(("http://", "https://"))
+        if is_url:
+            resp = http_session().get(path_or_url, stream=True)
             resp.raise_for_status()
             length = int(resp.headers.get("Content-Length", 0))
-            r = ReadProgress(resp.raw, length)
+            r = ReadProgress(resp.iter_content(chunk_size=1 << 20), length)
             print("tmpfile path:", r.filepath())
+        elif stream:
+            r = None  # install_stream reads the local file itself
         else:
             length = os.stat(path_or_url).st_size
             fd = open(path_or_url, "rb")
             r = ReadProgress(fd, length, source_path=path_or_url)
 
-        def _dprint(*args):
-            if not silent:
-                print(*args)
-
         dst = "/data/local/tmp/tmp-%d.apk" % (int(time.time() * 1000))
-        _dprint("push to %s" % dst)
-
         start = time.time()
-        self.sync.push(r, dst)
-
-        # parse apk package-name
-        apk = apkutils2.APK(r.filepath())
-        package_name = apk.manifest.package_name
-        main_activity = apk.manifest.main_activity
+        if r is not None:
+            try:
+                if stream:
+                    # apk content is sent when install, download it to the local tmpfile first
+                    while r.read(1 << 20):
+                        pass
+                else:
+                    _dprint("push to %s" % dst)
+                    self.sync.push(r, dst)
+            finally:
+                # a failed push is retried with a new ReadProgress, stop the md5 thread of this one
+                r.close()
+        apk_path = r.filepath() if r is not None else path_or_url
+
+        # parse apk package-name, only AndroidManifest.xml is read
+        with open(apk_path, "rb") as f:
+            manifest = APKReader(f).manifest()
+        package_name = manifest.package_name
+        main_activity = manifest.main_activity
         if main_activity and main_activity.find(".") == -1:
             main_activity = "." + main_activity
 
-        version_code = apk.manifest.version_code
         _dprint("packageName:", package_name)
         _dprint("mainActivity:", main_activity)
-        _dprint("apkVersion: {}".format(apk.manifest.version_name))
-        _dprint("Success pushed, time used %d seconds" % (time.time() - start))
-
-        new_dst = "/data/local/tmp/{}-{}.apk".format(package_name,
-                                                     version_code)
-        _dprint("Rename to {}".format(new_dst))
-        self.shell(["mv", dst, new_dst])
-
-        dst = new_dst
-        info = self.sync.stat(dst)
-        print("verify pushed apk, md5: %s, size: %s" %
-              (r._hash, humanize(info.size)))
-        assert info.size == r.copied
+        _dprint("apkVersion: {}".format(manifest.version_name))
+        if not stream:
+            _dprint("Success pushed, time used %d seconds" % (time.time() - start))
+
+            # sync.push already fails on incomplete transfer, content check is opt-in
+            if verify:
+                remote_md5 = self.shell(["md5sum", dst]).split(" ", 1)[0]
+                if remote_md5 != r._hash:
+                    raise AdbError("pushed apk md5 mismatch", remote_md5, r._hash)
+            print("pushed apk, md5: %s, size: %s" %
+                  (r._hash, humanize(r.copied)))
+
+        def _install():
+            if stream:
+                self.install_stream(apk_path, flags=flags)
+            else:
+                self.install_remote(dst, clean=True, flags=flags)
 
         if uninstall:
             _dprint("Uninstall app first")
@@ -119,7 +151,7 @@ class InstallExtension(AbstractDevice):
             if callback:
                 callback("BEFORE_INSTALL")
 
-            self.install_remote(dst, clean=True, flags=flags)
+            _install()
             _dprint("Success installed, time used %d seconds" %
                     (time.time() - start))
             if not nolaunch:
@@ -134,7 +166,7 @@ class InstallExtension(AbstractDevice):
             ]:
                 _dprint("uninstall %s because %s" % (package_name, e.reason))
                 self.uninstall(package_name)
-                self.install_remote(dst, clean=True, flags=flags)
+                _install()
                 _dprint("Success installed, time used %d seconds" %
                         (time.time() - start))
                 if not nolaunch:
@@ -146,9 +178,11 @@ class InstallExtension(AbstractDevice):
                     # ])
             elif e.reason == "INSTALL_FAILED_CANCELLED_BY_USER":
                 _dprint("Catch error %s, reinstall" % e.reason)
-                self.install_remote(dst, clean=True, flags=flags)
+                _install()
                 _dprint("Success installed, time used %d seconds" %
                         (time.time() - start))
+            elif stream:
+                raise
             else:
                 # print to console
                 print(
@@ -160,3 +194,26 @@ class InstallExtension(AbstractDevice):
             if callback:
                 callback("FINALLY")
 
+    def install_stream(self, path: str, flags: list = ["-r", "-t"]):
+        """
+        Install local apk with "cmd package install -S", apk content is sent
+        through the adb connection, no copy is left in /data/local/tmp
+
+        Args:
+            path: local apk path
+            flags (list): default ["-r", "-t"]
+
+        Raises:
+            AdbInstallError
+        """
+        size = os.stat(path).st_size
+        args = ["cmd", "package", "install"] + flags + ["-S", str(size)]
+        # exec: has no pty, binary data pass through unchanged
+        with self.open_transport() as c:
+            c.send_command("exec:" + list2cmdline(args))
+            c.check_okay()
+            with open(path, "rb") as f:
+                c.conn.sendfile(f)
+            output = c.read_until_close()
+        if "Success" not in output:
+            raise AdbInstallError(output)
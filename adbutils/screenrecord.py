@@ -10,7 +10,6 @@ import pathlib
 import shutil
 import signal
 import socket
-import subprocess
 import textwrap
 import threading
 import time
@@ -26,6 +25,9 @@ from adbutils._adb import AdbConnection, Network
 from adbutils._proto import ShellReturn
 from adbutils.sync import Sync
 
+if typing.TYPE_CHECKING:
+    import subprocess
+
 
 class AbstractDevice(abc.ABC):
     @property
@@ -121,7 +123,7 @@ class _ScrcpyScreenRecord(AbstractScreenrecord):
         self._d = d
         bin_name = "scrcpy" if os.name == "posix" else "scrcpy.exe"
         self._scrcpy_path = shutil.which(bin_name)
-        self._p: subprocess.Popen = None
+        self._p: typing.Optional["subprocess.Popen"] = None
 
     def is_recording(self) -> bool:
         return bool(self._p and self._p.poll() is None)
@@ -130,6 +132,8 @@ class _ScrcpyScreenRecord(AbstractScreenrecord):
         return self._scrcpy_path is not None
 
     def _start(self, filename: str):
+        import subprocess  # only needed while recording with scrcpy
+
         env = os.environ.copy()
         env["ADB"] = adb_path()
         env["ANDROID_SERIAL"] = self._d.serial
@@ -142,6 +146,8 @@ class _ScrcpyScreenRecord(AbstractScreenrecord):
         self._finalizer = weakref.finalize(self._p, self._p.kill)
 
     def _stop(self):
+        import subprocess
+
         self._finalizer.detach()
         self._p.send_signal(signal.SIGINT)
         try:
@@ -220,7 +226,7 @@ class _ScrcpyJarScreenrecord:
         ).start()
         time.sleep(0.1)
         stream_sock = self._safe_dial_scrcpy()
-        fh = pathlib.Path(self._filename).open("wb")
+        fh = pathlib.Path(self._filename).open("wb", buffering=1 << 20)
         threading.Thread(
             name="socket_copy",
             target=self._copy2file,
@@ -233,22 +239,24 @@ class _ScrcpyJarScreenrecord:
         return self._d.create_connection(Network.LOCAL_ABSTRACT, "scrcpy")
 
     def _copy2null(self, s: socket.socket):
+        buf = bytearray(4096)
         while True:
             try:
-                chunk = s.recv(1024)
-                if chunk == b"":
-                    print("O:", chunk.decode("utf-8"))
+                if not s.recv_into(buf):
                     break
-            except:
+            except OSError:
                 break
         print("Scrcpy mainThread stopped")
 
     def _copy2file(self, s: socket.socket, fh: typing.BinaryIO):
+        # reuse one buffer for the whole recording, no bytes object per chunk
+        buf = bytearray(1 << 16)
+        view = memoryview(buf)
         while True:
-            chunk = s.recv(1 << 16)
-            if not chunk:
+            n = s.recv_into(buf)
+            if not n:
                 break
-            fh.write(chunk)
+            fh.write(view[:n])
         fh.close()
         print("Copy h264 stream finished", flush=True)
         self._done_event.set()
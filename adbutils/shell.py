@@ -21,8 +21,31 @@ from adbutils.sync import Sync
 logger = logging.getLogger(__name__)
 
 _DISPLAY_RE = re.compile(
-    r".*DisplayViewport{.*?valid=true, .*?orientation=(?P<orientation>\d+), .*?deviceWidth=(?P<width>\d+), deviceHeight=(?P<height>\d+).*"
+    r".*DisplayViewport{.*?valid=true, .*?orientation=(?P<orientation>\d+), .*?deviceWidth=(?P<width>\d+), deviceHeight=(?P<height>\d+).*", re.ASCII
 )
+_ORIENTATION_RE = re.compile(r"orientation=(?P<orientation>\d+)", re.ASCII)
+_IFCONFIG_INET_RE = re.compile(r"inet\s*addr:(\d+\.\d+\.\d+\.\d+)", re.ASCII)
+_IP_ADDR_INET_RE = re.compile(r"inet (\d+\.\d+\.\d+\.\d+)/\d+", re.ASCII)
+_VERSION_NAME_RE = re.compile(r"versionName=(?P<name>[^\s]+)")
+_VERSION_CODE_RE = re.compile(r"versionCode=(?P<code>\d+)", re.ASCII)
+_PKG_SIGNATURES_RE = re.compile(r"PackageSignatures\{.*?\[(.*)\]\}")
+_PKG_FLAGS_RE = re.compile(r"pkgFlags=\[\s*(.*)\s*\]")
+_FIRST_INSTALL_TIME_RE = re.compile(r"firstInstallTime=([-\d]+\s+[:\d]+)", re.ASCII)
+_LAST_UPDATE_TIME_RE = re.compile(r"lastUpdateTime=([-\d]+\s+[:\d]+)", re.ASCII)
+_OVERRIDE_SIZE_RE = re.compile(r"Override size: (\d+)x(\d+)", re.ASCII)
+_PHYSICAL_SIZE_RE = re.compile(r"Physical size: (\d+)x(\d+)", re.ASCII)
+_FOCUSED_RE = re.compile(
+    r"mCurrentFocus=Window{.*\s+(?P<package>[^\s]+)/(?P<activity>[^\s]+)\}", re.ASCII
+)
+_RESUMED_RE = re.compile(
+    r"mResumedActivity: ActivityRecord\{.*?\s+(?P<package>[^\s]+)/(?P<activity>[^\s]+)\s.*?\}", re.ASCII
+)
+_ACTIVITY_RE = re.compile(
+    r"ACTIVITY (?P<package>[^\s]+)/(?P<activity>[^/\s]+) \w+ pid=(?P<pid>\d+)", re.ASCII
+)
+
+_ROTATION_CACHE_TTL = 0.1  # seconds rotation trust the last dumpsys display result
+_WM_SIZE_CACHE_TTL = 10.0  # seconds window_size trust the last "wm size" result
 
 
 def is_percent(v):
@@ -158,6 +181,9 @@ class ShellExtension(AbstractShellDevice):
         """
         Return screen (width, height) in pixel, width and height will be swapped if rotation is 90 or 270
 
+        The "wm size" result is cached for 10 seconds, call invalidate_size_cache() to see
+        a "wm size WxH" override or resolution change right away
+
         Args:
             landscape: bool, default None, if True, return (width, height), else return (height, width)
             
@@ -173,13 +199,26 @@ class ShellExtension(AbstractShellDevice):
         logger.debug("get window size from 'wm size'", wsize, landscape)
         return WindowSize(wsize.height, wsize.width) if landscape else wsize
     
+    def invalidate_size_cache(self):
+        """forget the cached "wm size" result, call it after the display size is changed"""
+        self._wm_size_cache = None
+
     def _wm_size(self) -> WindowSize:
+        # screen size hardly changes, clicks and swipes with percent positions reuse it
+        cache = self._wm_size_cache
+        if cache and time.monotonic() - cache[0] < _WM_SIZE_CACHE_TTL:
+            return cache[1]
+        wsize = self._raw_wm_size()
+        self._wm_size_cache = (time.monotonic(), wsize)
+        return wsize
+
+    def _raw_wm_size(self) -> WindowSize:
         output = self.shell("wm size")
-        o = re.search(r"Override size: (\d+)x(\d+)", output)
+        o = _OVERRIDE_SIZE_RE.search(output)
         if o:
             w, h = o.group(1), o.group(2)
             return WindowSize(int(w), int(h))
-        m = re.search(r"Physical size: (\d+)x(\d+)", output)
+        m = _PHYSICAL_SIZE_RE.search(output)
         if m:
             w, h = m.group(1), m.group(2)
             return WindowSize(int(w), int(h))
@@ -232,20 +271,20 @@ class ShellExtension(AbstractShellDevice):
 
     def wlan_ip(self) -> str:
         """get device wlan ip address"""
-        result = self.shell(["ifconfig", "wlan0"])
-        m = re.search(r"inet\s*addr:(.*?)\s", result, re.DOTALL)
+        # most devices have ip, Huawei P30 even has no ifconfig
+        result = self.shell(["ip", "addr", "show", "dev", "wlan0"])
+        m = _IP_ADDR_INET_RE.search(result)
         if m:
             return m.group(1)
 
-        # Huawei P30, has no ifconfig
-        result = self.shell(["ip", "addr", "show", "dev", "wlan0"])
-        m = re.search(r"inet (\d+.*?)/\d+", result)
+        result = self.shell(["ifconfig", "wlan0"])
+        m = _IFCONFIG_INET_RE.search(result)
         if m:
             return m.group(1)
 
         # On VirtualDevice, might use eth0
         result = self.shell(["ifconfig", "eth0"])
-        m = re.search(r"inet\s*addr:(.*?)\s", result, re.DOTALL)
+        m = _IFCONFIG_INET_RE.search(result)
         if m:
             return m.group(1)
 
@@ -256,12 +295,23 @@ class ShellExtension(AbstractShellDevice):
         Returns:
             int [0, 1, 2, 3]
         """
-        for line in self.shell("dumpsys display").splitlines():
-            m = re.search(r".*?orientation=(?P<orientation>\d+)", line)
-            if not m:
-                continue
-            o = int(m.group("orientation"))
-            return int(o)
+        cache = self._rotation_cache
+        if cache and time.monotonic() - cache[0] < _ROTATION_CACHE_TTL:
+            return cache[1]
+        rotation = self._raw_rotation()
+        self._rotation_cache = (time.monotonic(), rotation)
+        return rotation
+
+    def _raw_rotation(self) -> int:
+        # filter on device to save transferring the whole dumpsys output
+        if self._has_grep():
+            output = self.shell("dumpsys display | grep -m 1 orientation=")
+        else:
+            output = self.shell("dumpsys display")
+        # search stops at the first hit, no need to split the output into lines
+        m = _ORIENTATION_RE.search(output)
+        if m:
+            return int(m.group("orientation"))
         raise AdbError("rotation get failed")
 
     def remove(self, path: str):
@@ -273,11 +323,11 @@ class ShellExtension(AbstractShellDevice):
         self.shell(["rm", "-r", path])
 
     def is_screen_on(self):
-        output = self.shell(["dumpsys", "power"])
+        output = self._dumpsys_grep("power", "mHoldingDisplaySuspendBlocker=")
         return "mHoldingDisplaySuspendBlocker=true" in output
 
     def open_browser(self, url: str):
-        if not re.match("^https?://", url):
+        if not url.startswith(("http://", "https://")):
             url = "https://" + url
         self.shell(["am", "start", "-a", "android.intent.action.VIEW", "-d", url])
 
@@ -301,9 +351,12 @@ class ShellExtension(AbstractShellDevice):
         if filter_list:
             cmd.extend(filter_list)
         output = self.shell(cmd)
-        for m in re.finditer(r"^package:([^\s]+)\r?$", output, re.M):
-            result.append(m.group(1))
-        return list(sorted(result))
+        for line in output.splitlines():
+            if line.startswith("package:"):
+                name = line[len("package:"):].rstrip()
+                if name and " " not in name:
+                    result.append(name)
+        return sorted(result)
 
     def uninstall(self, pkg_name: str):
         """
@@ -372,28 +425,27 @@ class ShellExtension(AbstractShellDevice):
         sub_apk_paths = list(map(lambda p: p.replace("package:", "", 1), apk_paths[1:]))
 
         output = self.shell(["dumpsys", "package", package_name])
-        m = re.compile(r"versionName=(?P<name>[^\s]+)").search(output)
+        m = _VERSION_NAME_RE.search(output)
         version_name = m.group("name") if m else ""
         if version_name == "null":  # Java dumps "null" for null values
             version_name = None
-        m = re.compile(r"versionCode=(?P<code>\d+)").search(output)
+        m = _VERSION_CODE_RE.search(output)
         version_code = m.group("code") if m else ""
         version_code = int(version_code) if version_code.isdigit() else None
-        m = re.search(r"PackageSignatures\{.*?\[(.*)\]\}", output)
+        m = _PKG_SIGNATURES_RE.search(output)
         signature = m.group(1) if m else None
         if not version_name and signature is None:
             return None
-        m = re.compile(r"pkgFlags=\[\s*(.*)\s*\]").search(output)
+        m = _PKG_FLAGS_RE.search(output)
         pkgflags = m.group(1) if m else ""
         pkgflags = pkgflags.split()
 
-        time_regex = r"[-\d]+\s+[:\d]+"
-        m = re.compile(f"firstInstallTime=({time_regex})").search(output)
+        m = _FIRST_INSTALL_TIME_RE.search(output)
         first_install_time = (
             datetime.datetime.strptime(m.group(1), "%Y-%m-%d %H:%M:%S") if m else None
         )
 
-        m = re.compile(f"lastUpdateTime=({time_regex})").search(output)
+        m = _LAST_UPDATE_TIME_RE.search(output)
         last_update_time = (
             datetime.datetime.strptime(m.group(1).strip(), "%Y-%m-%d %H:%M:%S")
             if m
@@ -413,15 +465,46 @@ class ShellExtension(AbstractShellDevice):
         )
         return app_info
 
-    @retry(AdbError, delay=0.5, tries=3, jitter=0.1)
-    def app_current(self) -> RunningAppInfo:
+    def app_current(self, ttl: float = 0) -> RunningAppInfo:
         """
+        Args:
+            ttl: seconds a previous result can be reused without asking the device again,
+                useful when polling, default 0 (always query)
+
         Returns:
             RunningAppInfo(package, activity, pid?)  pid can be 0
 
         Raises:
             AdbError
+
+        Note:
+            when mCurrentFocus is missing, "dumpsys activity top" is asked before
+            "dumpsys activity activities", a single top activity is returned directly.
+            When no top activity is listed, the resumed activity is returned with pid 0
+        """
+        cache = self._app_current_cache
+        if ttl > 0 and cache and time.monotonic() - cache[0] < ttl:
+            return cache[1]
+        info = self._app_current()
+        self._app_current_cache = (time.monotonic(), info)
+        return info
+
+    def _has_grep(self) -> bool:
+        """ grep is missing before Android 6.0, probed only once per device """
+        if self._grep_supported is None:
+            self._grep_supported = self.shell("echo ok | grep ok") == "ok"
+        return self._grep_supported
+
+    def _dumpsys_grep(self, args: str, keyword: str) -> str:
+        """ run dumpsys and keep only lines containing keyword, filtered on device to transfer less data
+        return the full output when the device has no grep
         """
+        if self._has_grep():
+            return self.shell(f"dumpsys {args} | grep '{keyword}'")
+        return self.shell(f"dumpsys {args}")
+
+    @retry(AdbError, delay=0.5, tries=3, jitter=0.1)
+    def _app_current(self) -> RunningAppInfo:
         # Related issue: https://github.com/openatx/uiautomator2/issues/200
         # $ adb shell dumpsys window windows
         # Example output:
@@ -430,44 +513,38 @@ class ShellExtension(AbstractShellDevice):
         # Regexp
         #   r'mFocusedApp=.*ActivityRecord{\w+ \w+ (?P<package>.*)/(?P<activity>.*) .*'
         #   r'mCurrentFocus=Window{\w+ \w+ (?P<package>.*)/(?P<activity>.*)\}')
-        _focusedRE = re.compile(
-            r"mCurrentFocus=Window{.*\s+(?P<package>[^\s]+)/(?P<activity>[^\s]+)\}"
-        )
-        m = _focusedRE.search(self.shell(["dumpsys", "window", "windows"]))
+        m = _FOCUSED_RE.search(self._dumpsys_grep("window windows", "mCurrentFocus="))
         if m:
             return RunningAppInfo(
                 package=m.group("package"), activity=m.group("activity")
             )
 
-        # search mResumedActivity
+        # try: adb shell dumpsys activity top, it carries the pid
         # https://stackoverflow.com/questions/13193592/adb-android-getting-the-name-of-the-current-activity
-        package = None
-        output = self.shell(["dumpsys", "activity", "activities"])
-        _recordRE = re.compile(
-            r"mResumedActivity: ActivityRecord\{.*?\s+(?P<package>[^\s]+)/(?P<activity>[^\s]+)\s.*?\}"
-        )  # yapf: disable
-        m = _recordRE.search(output)
-        if m:
-            package = m.group("package")
-
-        # try: adb shell dumpsys activity top
-        _activityRE = re.compile(
-            r"ACTIVITY (?P<package>[^\s]+)/(?P<activity>[^/\s]+) \w+ pid=(?P<pid>\d+)"
-        )
-        output = self.shell(["dumpsys", "activity", "top"])
-        ms = _activityRE.finditer(output)
-        ret = None
-        for m in ms:
-            ret = RunningAppInfo(
+        output = self._dumpsys_grep("activity top", "ACTIVITY ")
+        infos = [
+            RunningAppInfo(
                 package=m.group("package"),
                 activity=m.group("activity"),
                 pid=int(m.group("pid")),
-            )
-            if ret.package == package:
-                return ret
+            ) for m in _ACTIVITY_RE.finditer(output)
+        ]
+        if len(infos) == 1:
+            return infos[0]
 
-        if ret:  # get last result
-            return ret
+        # several (or no) top activities, use mResumedActivity to pick one
+        output = self._dumpsys_grep("activity activities", "mResumedActivity:")
+        m = _RESUMED_RE.search(output)
+        if m:
+            package = m.group("package")
+            for info in infos:
+                if info.package == package:
+                    return info
+            if not infos:
+                return RunningAppInfo(package=package, activity=m.group("activity"))
+
+        if infos:  # get last result
+            return infos[-1]
         raise AdbError("Couldn't get focused app")
 
     def dump_hierarchy(self) -> str:
@@ -486,10 +563,7 @@ class ShellExtension(AbstractShellDevice):
         if 'ERROR' in output or 'success' not in output:
             raise AdbError("uiautomator dump failed", output)
 
-        buf = b''
-        for chunk in self.sync.iter_content(target):
-            buf += chunk
-        xml_data = buf.decode("utf-8")
+        xml_data = self.sync.read_bytes(target).decode("utf-8")
         if not xml_data.startswith('<?xml'):
             raise AdbError("dump output is not xml", xml_data)
         return xml_data
@@ -13,12 +13,14 @@ import os
 import io
 import stat
 import pathlib
+import queue
+import socket
 from contextlib import contextmanager
 
-from adbutils._adb import BaseClient, AdbError
+from adbutils._adb import _HAS_SENDMSG, AdbConnection, BaseClient, AdbError
 from adbutils._proto import FileInfo
 from adbutils._utils import append_path
-from adbutils.errors import AdbSyncError
+from adbutils.errors import AdbSyncError, AdbTimeout
 
 logger = logging.getLogger(__name__)
 
@@ -28,6 +30,70 @@ _DENT = "DENT"  # Directory Entity
 _DONE = "DONE"
 _DATA = "DATA"
 
+_SYNC_DATA_MAX = 64 * 1024  # max payload of a DATA packet accepted by adbd
+_U32 = struct.Struct("<I")
+_STAT_HEADER = struct.Struct("<III")  # mode, size, mtime
+_DENT_HEADER = struct.Struct("<IIII")  # mode, size, mtime, namelen
+
+# reusable DATA payload buffers, shared by concurrent push/iter_content calls
+_BUFFER_POOL = queue.LifoQueue(maxsize=8)
+
+
+def _acquire_buffer() -> bytearray:
+    try:
+        return _BUFFER_POOL.get_nowait()
+    except queue.Empty:
+        return bytearray(_SYNC_DATA_MAX)
+
+
+def _release_buffer(buf: bytearray):
+    try:
+        _BUFFER_POOL.put_nowait(buf)
+    except queue.Full:
+        pass
+
+
+def _is_regular_file(f) -> bool:
+    """ check if f is backed by a regular file, which can be sent with sendfile """
+    try:
+        return stat.S_ISREG(os.fstat(f.fileno()).st_mode)
+    except (AttributeError, OSError, ValueError):  # io.UnsupportedOperation is OSError
+        return False
+
+
+def _recv_exact_into(c: AdbConnection, view: memoryview):
+    """ fill the whole view from the connection """
+    offset = 0
+    try:
+        while offset < len(view):
+            nbytes = c.conn.recv_into(view[offset:])
+            if not nbytes:
+                raise AdbError("read chunk missing")
+            offset += nbytes
+    except socket.timeout:
+        raise AdbTimeout("adb read timeout")
+
+
+def _send_packet(conn: socket.socket, header: bytes, data) -> None:
+    """ send header and data in one syscall when possible, without joining them into a new buffer """
+    if not _HAS_SENDMSG:  # windows
+        conn.sendall(header + data)
+        return
+    sent = conn.sendmsg([header, data])
+    if sent < len(header):
+        conn.sendall(header[sent:])
+        conn.sendall(data)
+    elif sent - len(header) < len(data):
+        conn.sendall(memoryview(data)[sent - len(header):])
+
+
+def _read_exact(c: AdbConnection, n: int) -> bytes:
+    """ conn.recv may return less than n bytes, AdbConnection.read loops until n bytes are received """
+    data = c.read(n)
+    if len(data) != n:
+        raise AdbError("connection closed", n, len(data))
+    return data
+
 
 class Sync():
 
@@ -44,10 +110,8 @@ class Sync():
             c.send_command("sync:")
             c.check_okay()
             # {COMMAND}{LittleEndianPathLength}{Path}
-            path_len = len(path.encode('utf-8'))
-            c.conn.send(
-                cmd.encode("utf-8") + struct.pack("<I", path_len) +
-                path.encode("utf-8"))
+            path_bytes = path.encode("utf-8")
+            c.conn.sendall(cmd.encode("utf-8") + _U32.pack(len(path_bytes)) + path_bytes)
             yield c
         finally:
             c.close()
@@ -59,7 +123,7 @@ class Sync():
     def stat(self, path: str) -> FileInfo:
         with self._prepare_sync(path, "STAT") as c:
             assert "STAT" == c.read_string(4)
-            mode, size, mtime = struct.unpack("<III", c.conn.recv(12))
+            mode, size, mtime = _STAT_HEADER.unpack(_read_exact(c, _STAT_HEADER.size))
             # when mtime is 0, windows will error
             mdtime = datetime.datetime.fromtimestamp(mtime) if mtime else None
             return FileInfo(mode, size, mdtime, path)
@@ -70,8 +134,7 @@ class Sync():
                 response = c.read_string(4)
                 if response == _DONE:
                     break
-                mode, size, mtime, namelen = struct.unpack(
-                    "<IIII", c.conn.recv(16))
+                mode, size, mtime, namelen = _DENT_HEADER.unpack(_read_exact(c, _DENT_HEADER.size))
                 name = c.read_string(namelen)
                 try:
                     mtime = datetime.datetime.fromtimestamp(mtime)
@@ -131,15 +194,30 @@ class Sync():
         with self._prepare_sync(path, "SEND") as c:
             r = src if hasattr(src, "read") else open(src, "rb")
             try:
-                while True:
-                    chunk = r.read(4096) # should not >64k
-                    if not chunk:
-                        mtime = int(datetime.datetime.now().timestamp())
-                        c.conn.send(b"DONE" + struct.pack("<I", mtime))
-                        break
-                    c.conn.send(b"DATA" + struct.pack("<I", len(chunk)))
-                    c.conn.send(chunk)
-                    total_size += len(chunk)
+                if _is_regular_file(r):
+                    total_size = self._sendfile_data(c.conn, r)
+                elif hasattr(r, "readinto"):
+                    buf = _acquire_buffer()
+                    try:
+                        view = memoryview(buf)
+                        while True:
+                            n = r.readinto(buf)
+                            if not n:
+                                break
+                            _send_packet(c.conn, b"DATA" + _U32.pack(n), view[:n])
+                            total_size += n
+                    finally:
+                        view.release()
+                        _release_buffer(buf)
+                else:
+                    while True:
+                        chunk = r.read(_SYNC_DATA_MAX)
+                        if not chunk:
+                            break
+                        _send_packet(c.conn, b"DATA" + _U32.pack(len(chunk)), chunk)
+                        total_size += len(chunk)
+                mtime = int(datetime.datetime.now().timestamp())
+                c.conn.sendall(b"DONE" + _U32.pack(mtime))
                 status_msg = c.read_string(4)
                 if status_msg != _OKAY:
                     raise AdbError(status_msg)
@@ -154,24 +232,47 @@ class Sync():
                     (total_size, file_size))
         return total_size
 
+    def _sendfile_data(self, conn: socket.socket, f: typing.BinaryIO) -> int:
+        """ send the rest of a regular file as DATA packets, content is copied by the kernel """
+        offset = f.tell()
+        end = os.fstat(f.fileno()).st_size
+        total_size = 0
+        while offset < end:
+            size = min(_SYNC_DATA_MAX, end - offset)
+            conn.sendall(b"DATA" + _U32.pack(size))
+            if conn.sendfile(f, offset, size) != size:
+                raise AdbError("file truncated during push")
+            offset += size
+            total_size += size
+        return total_size
+
     def iter_content(self, path: str) -> typing.Iterator[bytes]:
-        with self._prepare_sync(path, "RECV") as c:
-            while True:
-                cmd = c.read_string(4)
-                if cmd == _FAIL:
-                    str_size = struct.unpack("<I", c.read(4))[0]
-                    error_message = c.read_string(str_size)
-                    raise AdbError(error_message, path)
-                elif cmd == _DONE:
-                    break
-                elif cmd == _DATA:
-                    chunk_size = struct.unpack("<I", c.read(4))[0]
-                    chunk = c.read(chunk_size)
-                    if len(chunk) != chunk_size:
-                        raise AdbError("read chunk missing")
-                    yield chunk
-                else:
-                    raise AdbError("Invalid sync cmd", cmd)
+        buf = _acquire_buffer()
+        view = memoryview(buf)
+        try:
+            with self._prepare_sync(path, "RECV") as c:
+                while True:
+                    # every RECV response starts with {ID}{LittleEndianLength}, read both at once
+                    header = _read_exact(c, 8)
+                    cmd = header[:4].decode("utf-8", errors="replace")
+                    size = _U32.unpack_from(header, 4)[0]
+                    if cmd == _FAIL:
+                        error_message = c.read_string(size)
+                        raise AdbError(error_message, path)
+                    elif cmd == _DONE:
+                        break
+                    elif cmd == _DATA:
+                        if size > len(buf):  # adbd never sends more than 64KiB
+                            yield _read_exact(c, size)
+                            continue
+                        # receive into the pooled buffer, only the returned bytes are allocated
+                        _recv_exact_into(c, view[:size])
+                        yield bytes(view[:size])
+                    else:
+                        raise AdbError("Invalid sync cmd", cmd)
+        finally:
+            view.release()
+            _release_buffer(buf)
 
     def read_bytes(self, path: str) -> bytes:
         return b''.join(self.iter_content(path))
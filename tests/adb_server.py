@@ -8,6 +8,7 @@ import asyncio
 import functools
 import logging
 import re
+import struct
 from typing import Union, overload
 
 logger = logging.getLogger(__name__)
@@ -72,6 +73,9 @@ class Context:
     async def recv(self, length: int) -> bytes:
         return await self.reader.read(length)
 
+    async def recv_exactly(self, length: int) -> bytes:
+        return await self.reader.readexactly(length)
+
     async def recv_string_block(self) -> str:
         length = int((await self.recv(4)).decode(), 16)
         return (await self.recv(length)).decode()
@@ -131,7 +135,115 @@ SHELL_DEBUGS = {
 
 SHELL_OUTPUTS = {
     "pwd": "/",
+    "pwd; echo X4EXIT:$?": "/\nX4EXIT:0",
+    "logcat -v time": "I/python: hello\nI/other: world\nI/中文: 你好",
+}
+
+# exec: has no pty, commands not listed here behave like a device before Android 5.0
+EXEC_OUTPUTS = {
+    "getprop": "[ro.product.name]: [sdk_phone]\n[ro.product.model]: [Pixel 5]\n[ro.empty]: []",
+    "getprop ro.product.model": "Pixel 6",
 }
+EXEC_COMMANDS = []
+
+async def handle_exec(ctx: Context, exec_cmd: str):
+    EXEC_COMMANDS.append(exec_cmd)
+    if exec_cmd == "offline":
+        await ctx.send(b"FAIL")
+        await ctx.send(encode("device offline"))
+    elif exec_cmd in EXEC_OUTPUTS:
+        await ctx.send(b"OKAY")
+        await ctx.send((EXEC_OUTPUTS[exec_cmd] + "\n").encode())
+    else:
+        await ctx.send(b"FAIL")
+        await ctx.send(encode("closed"))
+
+
+@register_command(re.compile("host-serial:.*:get-state"))
+async def host_serial_get_state(ctx: Context):
+    await ctx.send(b"OKAY")
+    await ctx.send(encode_string("device"))
+
+
+@register_command(re.compile("host-serial:.*:get-serialno"))
+async def host_serial_get_serialno(ctx: Context):
+    serial = ctx.command.split(":")[1]
+    await ctx.send(b"OKAY")
+    await ctx.send(encode_string(serial))
+
+
+SYNC_FILES = {
+    "/data/local/tmp/hello.txt": b"hello world",
+}
+
+async def handle_sync(ctx: Context):
+    """ serve one sync request (STAT, RECV or SEND) from SYNC_FILES """
+    cmd = await ctx.recv_exactly(4)
+    path_length = struct.unpack("<I", await ctx.recv_exactly(4))[0]
+    path = (await ctx.recv_exactly(path_length)).decode()
+    if cmd == b"STAT":
+        if path in SYNC_FILES:
+            await ctx.send(b"STAT" + struct.pack("<III", 0o100644, len(SYNC_FILES[path]), 1700000000))
+        else:
+            await ctx.send(b"STAT" + struct.pack("<III", 0, 0, 0))
+    elif cmd == b"RECV":
+        if path not in SYNC_FILES:
+            message = b"No such file or directory"
+            await ctx.send(b"FAIL" + struct.pack("<I", len(message)) + message)
+            return
+        content = SYNC_FILES[path]
+        for i in range(0, len(content), 4):  # small chunks to exercise multiple DATA packets
+            chunk = content[i:i+4]
+            await ctx.send(b"DATA" + struct.pack("<I", len(chunk)) + chunk)
+        await ctx.send(b"DONE" + struct.pack("<I", 0))
+    elif cmd == b"SEND":
+        dst = path.rsplit(",", 1)[0]
+        chunks = []
+        while True:
+            packet = await ctx.recv_exactly(4)
+            size = struct.unpack("<I", await ctx.recv_exactly(4))[0]
+            if packet == b"DONE":
+                break
+            chunks.append(await ctx.recv_exactly(size))
+        SYNC_FILES[dst] = b"".join(chunks)
+        await ctx.send(b"OKAY" + struct.pack("<I", 0))
+
+
+# version 2 header with colorspace, 2x1 BGRA pixels
+FRAMEBUFFER = struct.pack("<14I", 2, 32, 1, 8, 2, 1, 16, 8, 0, 8, 8, 8, 24, 8) + bytes([1, 2, 3, 4]) * 2
+
+# command: (stdout, stderr, exit code)
+SHELL_V2_OUTPUTS = {
+    "false": (b"hello\n", b"oops\n", 2),
+    "bad-exit": (b"", b"", None),
+}
+
+async def handle_shell_v2(ctx: Context, shell_cmd: str):
+    """ shell protocol v2, every packet is id(1 byte) + length(uint32) + data """
+    if shell_cmd not in SHELL_V2_OUTPUTS:
+        await ctx.send(b"FAIL")
+        await ctx.send(encode("unknown command"))
+        return
+    stdout, stderr, exit_code = SHELL_V2_OUTPUTS[shell_cmd]
+    await ctx.send(b"OKAY")
+    await ctx.send(struct.pack("<BI", 1, len(stdout)) + stdout)
+    await ctx.send(struct.pack("<BI", 2, len(stderr)) + stderr)
+    if exit_code is None:  # broken exit packet without the code
+        await ctx.send(struct.pack("<BI", 3, 0))
+    else:
+        await ctx.send(struct.pack("<BI", 3, 1) + bytes([exit_code]))
+
+
+INSTALLED_APKS = []
+
+async def handle_install_stream(ctx: Context, cmd: str):
+    """ cmd package install ... -S size, apk content follows the command """
+    args = cmd.split()
+    size = int(args[args.index("-S") + 1])
+    await ctx.send(b"OKAY")
+    INSTALLED_APKS.append(await ctx.recv_exactly(size))
+    await ctx.send(b"Success\n")
+
 
 @register_command(re.compile("host:tport:serial:.*"))
 async def host_tport_serial(ctx: Context):
@@ -142,8 +254,35 @@ async def host_tport_serial(ctx: Context):
     else:
         await ctx.send(b"OKAY")
         await ctx.send(b"\x00\x00\x00\x00\x00\x00\x00\x00")
+    await handle_transport(ctx)
 
+
+@register_command(re.compile("host:transport:.*"))
+async def host_transport(ctx: Context):
+    await ctx.send(b"OKAY")
+    await handle_transport(ctx)
+
+
+async def handle_transport(ctx: Context):
+    """ serve the device service requested after the transport is selected """
     cmd = await ctx.recv_string_block()
+    if cmd == "sync:":
+        await ctx.send(b"OKAY")
+        await handle_sync(ctx)
+        return
+    if cmd.startswith("exec:cmd package install "):
+        await handle_install_stream(ctx, cmd)
+        return
+    if cmd == "framebuffer:":
+        await ctx.send(b"OKAY")
+        await ctx.send(FRAMEBUFFER)
+        return
+    if cmd.startswith("shell,v2:"):
+        await handle_shell_v2(ctx, cmd.split(":", 1)[1])
+        return
+    if cmd.startswith("exec:"):
+        await handle_exec(ctx, cmd.split(":", 1)[1])
+        return
     if not cmd.startswith("shell:"):
         await ctx.send(b"FAIL")
         await ctx.send(encode("unsupported command"))
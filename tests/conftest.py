@@ -38,7 +38,11 @@ def adb_server_fixture():
     th.start()
     wait_for_port(7305)
     yield
-    adbutils.AdbClient(port=7305).server_kill()
+    try:
+        adbutils.AdbClient(port=7305, socket_timeout=1).server_kill()
+    except adbutils.AdbError:  # killed by the test, server is still shutting down
+        pass
+    wait_for_port(7305, ready=False)
 
 
 
@@ -4,10 +4,13 @@
 """Created on Mon May 06 2024 14:41:10 by codeskyblue
 """
 
+import re
+import time
 from unittest import mock
 import pytest
 import adbutils
 from adbutils.errors import AdbError
+from adb_server import EXEC_COMMANDS
 
 
 def test_shell_pwd(adb: adbutils.AdbClient):
@@ -90,4 +93,219 @@ def test_shell_battery(adb: adbutils.AdbClient):
     assert bat.scale == 100
     assert bat.voltage == 5000
     assert bat.temperature == 25.0
-    assert bat.technology == "Li-ion"
\ No newline at end of file
+    assert bat.technology == "Li-ion"
+
+def test_prop_getprop_once(adb: adbutils.AdbClient):
+    d = adb.device(serial="123456")
+    EXEC_COMMANDS.clear()
+    assert d.prop.name == "sdk_phone"
+    assert d.prop.model == "Pixel 5"
+    assert d.prop.get("ro.empty") == ""
+    assert EXEC_COMMANDS == ["getprop"]
+    assert d.prop.get("ro.product.model", cache=False) == "Pixel 6"
+    assert EXEC_COMMANDS == ["getprop", "getprop ro.product.model"]
+
+
+def test_exec_out_fallback(adb: adbutils.AdbClient):
+    d = adb.device(serial="123456")
+    # transient errors are raised and exec: is still used later
+    with pytest.raises(AdbError):
+        d._exec_out("offline")
+    assert d._exec_out("getprop ro.product.model") == "Pixel 6"
+
+    # service closed by adbd, exec: is not supported, use shell: from now on
+    EXEC_COMMANDS.clear()
+    assert d._exec_out("pwd") == "/"
+    assert d._exec_out("getprop ro.product.model") == "unknown command"
+    assert EXEC_COMMANDS == ["pwd"]
+
+
+def test_list_packages(adb: adbutils.AdbClient):
+    d = adb.device(serial="123456")
+    d.shell = lambda cmd: "package:com.b\r\npackage:com.a\npackage:com.c installer=null\nerror"
+    assert d.list_packages() == ["com.a", "com.b"]
+
+
+def test_app_current_activity_top(adb: adbutils.AdbClient):
+    d = adb.device(serial="123456")
+    cmds = []
+
+    def mock_shell(cmd):
+        cmds.append(cmd)
+        if cmd == "echo ok | grep ok":
+            return "ok"
+        if cmd == "dumpsys activity top | grep 'ACTIVITY '":
+            return "  ACTIVITY com.example/.MainActivity 4b1ab8e pid=1234"
+        return ""
+
+    d.shell = mock_shell
+    info = d.app_current()
+    assert info.package == "com.example"
+    assert info.activity == ".MainActivity"
+    assert info.pid == 1234
+    assert not any("activities" in cmd for cmd in cmds)
+
+
+def test_app_current_fallback(adb: adbutils.AdbClient):
+    d = adb.device(serial="123456")
+    outputs = {
+        "echo ok | grep ok": "ok",
+        "dumpsys activity top | grep 'ACTIVITY '": "\n".join([
+            "  ACTIVITY com.launcher/.Home 1a2b3c4 pid=100",
+            "  ACTIVITY com.example/.MainActivity 4b1ab8e pid=1234",
+        ]),
+        "dumpsys activity activities | grep 'mResumedActivity:'":
+            "    mResumedActivity: ActivityRecord{9d3e2f1 u0 com.example/.MainActivity t12}",
+    }
+    d.shell = lambda cmd: outputs.get(cmd, "")
+    # mCurrentFocus missing, several top activities, the resumed one is picked
+    info = d.app_current()
+    assert info.package == "com.example"
+    assert info.activity == ".MainActivity"
+    assert info.pid == 1234
+
+    # no top activity, only the resumed activity is known
+    outputs["dumpsys activity top | grep 'ACTIVITY '"] = ""
+    info = d.app_current()
+    assert info.package == "com.example"
+    assert info.activity == ".MainActivity"
+    assert info.pid == 0
+
+
+def test_is_screen_on(adb: adbutils.AdbClient):
+    d = adb.device(serial="123456")
+    cmds = []
+
+    def mock_shell(cmd):
+        cmds.append(cmd)
+        if cmd == "echo ok | grep ok":
+            return "ok"
+        if cmd.startswith("dumpsys power | grep"):
+            return "  mHoldingDisplaySuspendBlocker=true"
+        return ""
+
+    d.shell = mock_shell
+    assert d.is_screen_on()
+    assert cmds == ["echo ok | grep ok", "dumpsys power | grep 'mHoldingDisplaySuspendBlocker='"]
+
+    # keyword absent, no second dumpsys and no second probe
+    d.shell = lambda cmd: cmds.append(cmd) or ""
+    assert not d.is_screen_on()
+    assert cmds[2:] == ["dumpsys power | grep 'mHoldingDisplaySuspendBlocker='"]
+
+
+def test_is_screen_on_without_grep(adb: adbutils.AdbClient):
+    d = adb.device(serial="123456")
+    cmds = []
+
+    def mock_shell(cmd):
+        cmds.append(cmd)
+        if cmd == "echo ok | grep ok":
+            return "/system/bin/sh: grep: not found"
+        if cmd == "dumpsys power":
+            return "Power Manager State:\n  mHoldingDisplaySuspendBlocker=true"
+        return ""
+
+    d.shell = mock_shell
+    assert d.is_screen_on()
+    assert d.is_screen_on()
+    assert cmds == ["echo ok | grep ok", "dumpsys power", "dumpsys power"]
+
+
+def test_window_size_cached(adb: adbutils.AdbClient):
+    d = adb.device(serial="123456")
+    cmds = []
+
+    def mock_shell(cmd):
+        cmds.append(cmd)
+        if cmd == "wm size":
+            return "Physical size: 1080x1920"
+        return ""
+
+    d.shell = mock_shell
+    d.rotation = lambda: 0
+    assert d.window_size() == d.window_size()
+    assert cmds.count("wm size") == 1
+    d.invalidate_size_cache()
+    d.window_size()
+    assert cmds.count("wm size") == 2
+    with mock.patch("adbutils.shell._WM_SIZE_CACHE_TTL", 0):  # expired
+        d.window_size()
+    assert cmds.count("wm size") == 3
+
+
+def test_shell2(adb: adbutils.AdbClient):
+    d = adb.device(serial="123456")
+    ret = d.shell2("pwd")
+    assert ret.returncode == 0
+    assert ret.output == "/\n"
+    assert d.shell2("pwd", rstrip=True).output == "/"
+    assert d.shell2("pwd", encoding=None).output == b"/\n"
+
+
+def test_shell2_v2(adb: adbutils.AdbClient):
+    d = adb.device(serial="123456")
+    d.get_features = lambda: "cmd,shell_v2,stat_v2"
+    ret = d.shell2("false")
+    assert ret.returncode == 2
+    assert ret.output == "hello\noops\n"
+    with pytest.raises(AdbError):
+        d.shell2("bad-exit")
+
+
+def test_has_feature_cached(adb: adbutils.AdbClient):
+    d = adb.device(serial="123456")
+    calls = []
+
+    def get_features():
+        calls.append(1)
+        raise AdbError("closed")
+
+    d.get_features = get_features
+    assert not d._has_feature("shell_v2")
+    assert not d._has_feature("cmd")
+    assert len(calls) == 1
+
+
+def test_framebuffer(adb: adbutils.AdbClient):
+    d = adb.device(serial="123456")
+    im = d.framebuffer()
+    assert im.size == (2, 1)
+    assert im.getpixel((0, 0)) == (3, 2, 1, 4)
+
+
+def test_logcat(adb: adbutils.AdbClient, tmp_path):
+    d = adb.device(serial="123456")
+    path = tmp_path / "logcat.txt"
+
+    def wait_done(evt):
+        # mock server closes the stream after the output, logcat stops by itself
+        deadline = time.time() + 5
+        while not evt.is_done() and time.time() < deadline:
+            time.sleep(.01)
+        assert evt.is_done()
+
+    wait_done(d.logcat(path))
+    assert path.read_text(encoding="utf-8") == "I/python: hello\nI/other: world\nI/中文: 你好\n"
+
+    wait_done(d.logcat(path, re_filter="python"))
+    assert path.read_text() == "I/python: hello\n"
+
+    wait_done(d.logcat(path, re_filter=re.compile("PYTHON", re.I)))
+    assert path.read_text() == "I/python: hello\n"
+
+    wait_done(d.logcat(path, re_filter="中文"))
+    assert path.read_text(encoding="utf-8") == "I/中文: 你好\n"
+
+    wait_done(d.logcat(path, re_filter=r"\N{CJK UNIFIED IDEOGRAPH-4F60}"))
+    assert path.read_text(encoding="utf-8") == "I/中文: 你好\n"
+
+    wait_done(d.logcat(path, re_filter=r"I/\w\w:"))
+    assert path.read_text(encoding="utf-8") == "I/中文: 你好\n"
+
+    # \xe4 is "ä", not the first utf-8 byte of "中"
+    wait_done(d.logcat(path, re_filter=r"\xe4"))
+    assert path.read_text(encoding="utf-8") == ""
+
+    wait_done(d.logcat(path, re_filter=r"\u4e2d"))
+    assert path.read_text(encoding="utf-8") == "I/中文: 你好\n"
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import asyncio
+
+import pytest
+
+import adbutils
+from adbutils.errors import AdbError
+from adb_server import SYNC_FILES
+
+
+def test_async_shell_pwd(adb: adbutils.AdbClient):
+    d = adbutils.AsyncAdbDevice(adb, serial="123456")
+    assert asyncio.run(d.shell("pwd")) == "/"
+    assert asyncio.run(d.shell(["pwd"], encoding=None)) == b"/\n"
+
+
+def test_async_get_state(adb: adbutils.AdbClient):
+    d = adbutils.AsyncAdbDevice(adb, serial="123456")
+    assert asyncio.run(d.get_state()) == "device"
+    assert asyncio.run(d.get_serialno()) == "123456"
+
+
+def test_async_sync_stat(adb: adbutils.AdbClient):
+    d = adbutils.AsyncAdbDevice(adb, serial="123456")
+    finfo = asyncio.run(d.sync.stat("/data/local/tmp/hello.txt"))
+    assert finfo.size == 11
+    assert finfo.mtime is not None
+    assert asyncio.run(d.sync.exists("/data/local/tmp/hello.txt"))
+    assert not asyncio.run(d.sync.exists("/data/local/tmp/missing.txt"))
+
+
+def test_async_sync_read(adb: adbutils.AdbClient):
+    d = adbutils.AsyncAdbDevice(adb, serial="123456")
+
+    async def collect(path: str):
+        return [chunk async for chunk in d.sync.iter_content(path)]
+
+    chunks = asyncio.run(collect("/data/local/tmp/hello.txt"))
+    assert len(chunks) > 1
+    assert b"".join(chunks) == b"hello world"
+    assert asyncio.run(d.sync.read_bytes("/data/local/tmp/hello.txt")) == b"hello world"
+    with pytest.raises(AdbError):
+        asyncio.run(d.sync.read_bytes("/data/local/tmp/missing.txt"))
+
+
+def test_async_sync_push(adb: adbutils.AdbClient, tmp_path):
+    d = adbutils.AsyncAdbDevice(adb, serial="123456")
+    assert asyncio.run(d.sync.push(b"from bytes", "/data/local/tmp/a.txt")) == 10
+    assert SYNC_FILES["/data/local/tmp/a.txt"] == b"from bytes"
+
+    local = tmp_path / "b.txt"
+    local.write_bytes(b"x" * 100000)  # more than one DATA packet
+    assert asyncio.run(d.sync.push(local, "/data/local/tmp/b.txt")) == 100000
+    assert SYNC_FILES["/data/local/tmp/b.txt"] == b"x" * 100000
@@ -31,4 +31,11 @@ def test_host_devices_extended_invalid(adb: adbutils.AdbClient):
     _dev = adb.device("any")
     assert _dev.shell(cmdargs="invalidate-devices") == 'debug command executed'
     devices = adb.list(extended=True)
-    assert devices == []
\ No newline at end of file
+    assert devices == []
+
+def test_device_info(adb: adbutils.AdbClient):
+    d = adb.device(serial="123456")
+    d.get_serialno = lambda: "123456"
+    d.get_devpath = lambda: "usb:1-1"
+    d.get_state = lambda: "device"
+    assert d.info == {"serialno": "123456", "devpath": "usb:1-1", "state": "device"}
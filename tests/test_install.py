@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import io
+from unittest import mock
+
+import adbutils
+from adbutils._utils import ReadProgress
+from adb_server import INSTALLED_APKS, SYNC_FILES
+
+
+def test_read_progress_close():
+    fd = io.BytesIO(b"x" * 100)
+    r = ReadProgress(fd, 100, source_path="dummy.apk")
+    assert r.read(10) == b"x" * 10
+    thread = r._hash_thread
+    assert thread.is_alive()
+    # transfer failed halfway, the md5 worker must not be left waiting
+    r.close()
+    assert not thread.is_alive()
+    assert fd.closed
+    r.close()
+
+
+def test_read_progress_iterator():
+    r = ReadProgress(iter([b"abc", b"def", b"gh"]), 8)
+    assert r.read(2) == b"ab"
+    assert r.read(-1) == b"cdefgh"
+    assert r.read() == b""
+    r = ReadProgress(iter([b"abc", b"def"]), 6)
+    assert r.read() == b"abcdef"
+    r.close()
+
+
+def mock_apk_reader(fp):
+    reader = mock.MagicMock()
+    reader.manifest.return_value.package_name = "com.example"
+    reader.manifest.return_value.main_activity = ".MainActivity"
+    return reader
+
+
+def test_install_stream(adb: adbutils.AdbClient, tmp_path):
+    d = adb.device(serial="123456")
+    apk = tmp_path / "app.apk"
+    apk.write_bytes(b"apk content")
+    d.install_stream(str(apk))
+    assert INSTALLED_APKS[-1] == b"apk content"
+
+
+def test_install_with_stream(adb: adbutils.AdbClient, tmp_path):
+    d = adb.device(serial="123456")
+    d.get_features = lambda: "shell_v2,cmd"
+    d.install_remote = mock.MagicMock()
+    apk = tmp_path / "app.apk"
+    apk.write_bytes(b"streamed apk")
+    with mock.patch("adbutils.install.APKReader", mock_apk_reader):
+        d.install(str(apk), nolaunch=True, silent=True, stream=True)
+    assert INSTALLED_APKS[-1] == b"streamed apk"
+    d.install_remote.assert_not_called()
+
+
+def test_install_stream_fallback(adb: adbutils.AdbClient, tmp_path):
+    d = adb.device(serial="123456")
+    d.get_features = lambda: "shell_v2"
+    d.install_remote = mock.MagicMock()
+    d.install_stream = mock.MagicMock()
+    apk = tmp_path / "app.apk"
+    apk.write_bytes(b"pushed apk")
+    with mock.patch("adbutils.install.APKReader", mock_apk_reader):
+        d.install(str(apk), nolaunch=True, silent=True, stream=True)
+    d.install_stream.assert_not_called()
+    remote_path = d.install_remote.call_args[0][0]
+    assert SYNC_FILES[remote_path] == b"pushed apk"
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+import warnings
+
+import pytest
+from deprecation import DeprecatedWarning, UnsupportedWarning
+
+from adbutils._utils import deprecated
+
+
+def test_deprecated():
+    @deprecated(deprecated_in="0.1.0", removed_in="9.0.0", current_version="1.0.0", details="use bar instead")
+    def foo():
+        """ return one """
+        return 1
+
+    assert foo.__doc__ == "return one\n\n.. deprecated:: 0.1.0\n   This will be removed in 9.0.0. use bar instead"
+    # every call warns, repeats are left to the warnings filters
+    for _ in range(2):
+        with pytest.deprecated_call():
+            assert foo() == 1
+    with warnings.catch_warnings(record=True) as records:
+        warnings.simplefilter("always")
+        foo()
+        foo()
+    assert len(records) == 2
+    assert isinstance(records[0].message, DeprecatedWarning)
+
+
+def test_deprecated_version():
+    @deprecated(deprecated_in="2.0.0", removed_in="3.0.0", current_version="1.0.0")
+    def not_yet():
+        return 1
+
+    @deprecated(deprecated_in="2.0.0", removed_in="3.0.0", current_version="3.1.0")
+    def removed():
+        return 1
+
+    @deprecated(deprecated_in="2.0.0", removed_in="3.0.0", current_version="unknown")
+    def unknown():
+        return 1
+
+    with warnings.catch_warnings(record=True) as records:
+        warnings.simplefilter("always")
+        not_yet()
+        removed()
+        unknown()
+    assert [type(r.message) for r in records] == [UnsupportedWarning, DeprecatedWarning]